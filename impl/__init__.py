@@ -1,9 +1,34 @@
 """
 .. include:: README.txt
 """
+from . import batch_rsa
+from . import benchmarks
+from . import chinese_remainder
 from . import discrete_log
+from . import factoring_jobs
 from . import factorization
+from . import index_calculus
+from . import key_pool
+from . import key_store
+from . import multiplicative_group
 from . import primality_testing
 from . import rsa
+from . import rsa_stream
+from . import service
 
-__all__ = ["discrete_log", "factorization", "primality_testing", "rsa"]
\ No newline at end of file
+__all__ = [
+    "batch_rsa",
+    "benchmarks",
+    "chinese_remainder",
+    "discrete_log",
+    "factoring_jobs",
+    "factorization",
+    "index_calculus",
+    "key_pool",
+    "key_store",
+    "multiplicative_group",
+    "primality_testing",
+    "rsa",
+    "rsa_stream",
+    "service",
+]
@@ -0,0 +1,183 @@
+import math
+
+import factorization
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Batch RSA decrypts several ciphers at the cost of about one decryption.
+#
+# One modulus n carries several small pairwise coprime public exponents e_1, ..., e_b. If the ciphers
+# c_1, ..., c_b were encrypted with different exponents, then with E = e_1 * ... * e_b:
+#
+#   m_1 * ... * m_b = (c_1^(E / e_1) * ... * c_b^(E / e_b))^(1 / E) (mod n)
+#
+# so one full size exponentiation (by E^(-1) mod phi(n)) gives the product of all the messages. The product is
+# split into the individual messages by the Chinese remainder theorem on the exponents, going down the product
+# tree of the exponents (percolation). The work done besides the one exponentiation only depends on the small exponents.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Batch RSA. (1997) (https://doi.org/10.1007/s001459900017)
+# [2] Improving SSL Handshake Performance via Batching. (2001) (https://doi.org/10.1007/3-540-45353-9_4)
+
+
+BATCH_EXPONENTS = (3, 5, 7, 11, 13, 17, 19, 23)
+
+
+def generate_key_pair(min, max, exponents=BATCH_EXPONENTS):
+    """
+    Follows the key generation protocol of batch RSA.
+
+    Args:
+        min (int): Minimal size of the probable prime used in the key generation.
+        max (int): Maximal size of the probable prime used in the key generation.
+        exponents (tuple, optional): Small pairwise coprime public exponents. Defaults to BATCH_EXPONENTS.
+
+    Returns:
+        tuple: The public key (n, exponents) and the secret key (PrivateKey for the product of the exponents).
+    """
+    product = math.prod(exponents)
+
+    (n, _), secret_key = rsa.generate_key_pair(min, max, e=product)
+
+    return (n, tuple(exponents)), secret_key
+
+
+def encrypt(message, public_key, e):
+    """Encrypts the message (an integer smaller than n) with one of the exponents of the public key."""
+    n, exponents = public_key
+
+    if e not in exponents:
+        raise ValueError("The exponent is not a part of the public key.")
+
+    return pow(message, e, n)
+
+
+def decrypt(cipher, e, public_key, secret_key):
+    """Decrypts one cipher encrypted with exponent e. (One full size exponentiation.)"""
+    n, exponents = public_key
+    product = math.prod(exponents)
+
+    # c^(1 / e) = (c^(E / e))^(1 / E)
+    return rsa.private_power(pow(cipher, product // e, n), (n, product), secret_key)
+
+
+def batch_decrypt(ciphers, public_key, secret_key):
+    """
+    Decrypts many ciphers. The ciphers are split into batches with different exponents,
+    every batch is decrypted by one full size exponentiation.
+
+    Args:
+        ciphers (list): Pairs (cipher, e), where e is the exponent the cipher was encrypted with.
+        public_key (tuple): The public key (n, exponents).
+        secret_key (PrivateKey): The secret key.
+
+    Raises:
+        ValueError: If some exponent is not a part of the public key.
+
+    Returns:
+        list: The decrypted messages (in the same order as the ciphers).
+    """
+    _, exponents = public_key
+    messages = [None] * len(ciphers)
+
+    # every batch contains each exponent at most once
+    batches = []
+
+    for index, (_, e) in enumerate(ciphers):
+        if e not in exponents:
+            raise ValueError("The exponent is not a part of the public key.")
+
+        batch = next((batch for batch in batches if e not in batch), None)
+
+        if batch is None:
+            batch = {}
+            batches.append(batch)
+
+        batch[e] = index
+
+    for batch in batches:
+        indices = list(batch.values())
+        decrypted = decrypt_batch(
+            [ciphers[index] for index in indices], public_key, secret_key
+        )
+
+        for index, message in zip(indices, decrypted):
+            messages[index] = message
+
+    return messages
+
+
+# [1], [2]
+def decrypt_batch(ciphers, public_key, secret_key):
+    """
+    Decrypts the batch of ciphers encrypted with different exponents by one full size exponentiation.
+
+    Args:
+        ciphers (list): Pairs (cipher, e) with different exponents e.
+        public_key (tuple): The public key (n, exponents).
+        secret_key (PrivateKey): The secret key.
+
+    Returns:
+        list: The decrypted messages (in the same order as the ciphers).
+    """
+    n, exponents = public_key
+    product = math.prod(exponents)
+
+    # levels of the product tree of the exponents, each node keeps E_node = product of its exponents
+    tree = factorization.product_tree([e for _, e in ciphers])
+
+    # going up: v_node = v_left^E_right * v_right^E_left, so that v_node^(1 / E_node) = product of its messages
+    values = [[cipher % n for cipher, _ in ciphers]]
+
+    for level, below in zip(tree[1:], tree):
+        children = values[-1]
+        values.append(
+            [
+                pow(children[2 * j], below[2 * j + 1], n)
+                * pow(children[2 * j + 1], below[2 * j], n)
+                % n
+                if 2 * j + 1 < len(children)
+                else children[2 * j]
+                for j in range(len(level))
+            ]
+        )
+
+    # the only full size exponentiation: product of all the messages (the root of the tree)
+    root = values[-1][0]
+    messages = [rsa.private_power(pow(root, product // tree[-1][0], n), (n, product), secret_key)]
+
+    # going down: the product M = M_left * M_right of the node is split by X = 0 (mod E_left), X = 1 (mod E_right)
+    for depth in range(len(tree) - 2, -1, -1):
+        below = tree[depth]
+        children = values[depth]
+        split = []
+
+        for j, m in enumerate(messages):
+            if 2 * j + 1 >= len(children):
+                split.append(m)
+                continue
+
+            e_left, e_right = below[2 * j], below[2 * j + 1]
+            x = e_left * (pow(e_left, -1, e_right) % e_right)
+
+            # M^X = v_left^(X / E_left) * M_right * v_right^((X - 1) / E_right)
+            known = (
+                pow(children[2 * j], x // e_left, n)
+                * pow(children[2 * j + 1], (x - 1) // e_right, n)
+                % n
+            )
+            m_right = pow(m, x, n) * pow(known, -1, n) % n
+            m_left = m * pow(m_right, -1, n) % n
+
+            split += [m_left, m_right]
+
+        messages = split
+
+    return messages
@@ -0,0 +1,514 @@
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import batch_rsa
+import discrete_log
+import factorization
+import primality_testing
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Benchmarks measuring the speed of the implemented algorithms.
+# The module can be run from the command line, for example: python benchmarks.py rho_dlog --bits 32 48
+# or: python benchmarks.py rsa_primes --bits 2048 4096
+# or: python benchmarks.py batch_rsa --bits 1024 2048
+#
+# The suite measures how the algorithms scale with the size of the input. For each size, a seeded workload
+# (primes, semiprimes, smooth numbers and DLP instances) is generated, so the same seed gives the same inputs
+# on every run. Each algorithm runs once on the workload unmeasured (warm-up), then the median time per input
+# of the repetitions is reported. The results can be saved as JSON or CSV and compared with a saved baseline:
+#   python benchmarks.py suite --output baseline.json
+#   python benchmarks.py suite --algorithms squfof pollard_rho_method --baseline baseline.json --threshold 0.2
+
+
+def prime_order_group(bits, seed=None):
+    """
+    Finds a subgroup of prime order of the multiplicative group Z*p.
+
+    Args:
+        bits (int): Number of bits of the prime order q.
+        seed (int, optional): Seed of the random generator. Defaults to None.
+
+    Returns:
+        tuple: Prime p, prime order q of the subgroup (q divides p - 1) and a generator of the subgroup.
+    """
+    generator = random.Random(seed)
+
+    while True:
+        q = generator.getrandbits(bits) | 1 | (1 << (bits - 1))
+
+        if not primality_testing.miller_rabin_test(q, 20)[0]:
+            continue
+
+        for k in range(2, 10 * bits, 2):
+            p = k * q + 1
+
+            if primality_testing.miller_rabin_test(p, 20)[0]:
+                g = pow(generator.randrange(2, p - 1), k, p)
+
+                if g != 1:
+                    return p, q, g
+
+
+def rho_dlog_steps_per_second(bits, workers=1, duration=2.0, seed=None):
+    """
+    Measures the speed of the r-adding walks of the (parallel) Pollard rho method for DLP.
+
+    Args:
+        bits (int): Number of bits of the prime order of the group.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        duration (float, optional): Number of seconds to walk. Defaults to 2.0.
+        seed (int, optional): Seed of the random generator used for the group. Defaults to None.
+
+    Returns:
+        float: Number of walk steps per second per core.
+    """
+    p, q, g = prime_order_group(bits, seed)
+    result = pow(g, random.randrange(q), p)
+
+    multipliers = discrete_log.adding_walk_multipliers(g, result, p, q)
+    distinguished_bits = max(0, bits // 4 - 2)
+    walk = (g, result, p, q, multipliers, distinguished_bits, 16)
+
+    steps = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+
+        while time.perf_counter() - start < duration:
+            batches = [
+                executor.submit(discrete_log.distinguished_points, *walk)
+                for _ in range(workers)
+            ]
+            steps += sum(batch.result()[1] for batch in batches)
+
+        elapsed = time.perf_counter() - start
+
+    return steps / elapsed / workers
+
+
+def rsa_private_operations_per_second(bits, count=2, duration=2.0, seed=None):
+    """
+    Measures the speed of the secret key operation of RSA (decryption or signing) with the CRT.
+
+    Args:
+        bits (int): Number of bits of the modulus.
+        count (int, optional): Number of primes of the modulus. Defaults to 2.
+        duration (float, optional): Number of seconds to measure. Defaults to 2.0.
+        seed (int, optional): Seed of the random generator used for the key. Defaults to None.
+
+    Returns:
+        float: Number of secret key operations per second.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    public_key, secret_key = rsa.generate_key_pair(*rsa.prime_bounds(bits, count), count=count)
+    n, _ = public_key
+
+    ciphers = [random.randrange(n) for _ in range(16)]
+    operations = 0
+
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < duration:
+        for cipher in ciphers:
+            rsa.private_power(cipher, public_key, secret_key)
+
+        operations += len(ciphers)
+
+    return operations / (time.perf_counter() - start)
+
+
+def batch_rsa_speedup(bits, batch_size=8, rounds=10, seed=None):
+    """
+    Compares the batch decryption of RSA with the decryption of each cipher on its own.
+
+    Args:
+        bits (int): Number of bits of the modulus.
+        batch_size (int, optional): Number of ciphers in a batch (and of public exponents). Defaults to 8.
+        rounds (int, optional): Number of batches decrypted. Defaults to 10.
+        seed (int, optional): Seed of the random generator used for the keys and messages. Defaults to None.
+
+    Returns:
+        tuple: Seconds per batch by the per-item decryption, by the batch decryption, and their ratio.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    exponents = batch_rsa.BATCH_EXPONENTS[:batch_size]
+    public_key, secret_key = batch_rsa.generate_key_pair(*rsa.prime_bounds(bits), exponents)
+    n, _ = public_key
+    p, q = secret_key.p, secret_key.q
+
+    # per-item: an ordinary CRT key for each exponent (what rsa.decrypt does for each cipher)
+    keys = {e: rsa.private_key(p, q, e) for e in exponents}
+
+    messages = [random.randrange(n) for _ in range(batch_size)]
+    ciphers = [(pow(m, e, n), e) for m, e in zip(messages, exponents)]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        single = [rsa.private_power(c, (n, e), keys[e]) for c, e in ciphers]
+    single_time = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        batch = batch_rsa.batch_decrypt(ciphers, public_key, secret_key)
+    batch_time = (time.perf_counter() - start) / rounds
+
+    assert single == batch == messages
+
+    return single_time, batch_time, single_time / batch_time
+
+
+# seeded inputs of one size: semiprimes are kept as pairs of primes (p, q), DLP instances as (generator, result, p)
+Workload = namedtuple("Workload", ["bits", "primes", "semiprimes", "smooth", "dlp"])
+
+# result of one algorithm on one size (seconds per input)
+Measurement = namedtuple("Measurement", ["algorithm", "bits", "median", "minimum", "repetitions", "inputs"])
+
+# measurement slower than the baseline by more than the threshold
+Regression = namedtuple("Regression", ["algorithm", "bits", "baseline", "current", "ratio"])
+
+
+def workload(bits, count=4, seed=0):
+    """
+    Generates the inputs of given size. (The same seed and size give the same inputs.)
+
+    Args:
+        bits (int): Number of bits of the inputs. (At least 4.)
+        count (int, optional): Number of inputs of each kind. Defaults to 4.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        Workload: Primes, semiprimes (p, q), smooth numbers and DLP instances (generator, result, p) of given size.
+    """
+    generator = random.Random(f"{seed}:{bits}")
+    small = rsa.small_primes(2**10)
+
+    primes = [rsa.random_prime(bits, generator) for _ in range(count)]
+    semiprimes = []
+
+    while len(semiprimes) < count:
+        p = rsa.random_prime(bits // 2, generator)
+        q = rsa.random_prime(bits - bits // 2, generator)
+
+        if p != q:
+            semiprimes.append((p, q))
+
+    smooth = [smooth_number(bits, small, generator) for _ in range(count)]
+
+    # p - 1 = 2 * smooth, so that the DLP is solvable by the Silver-Pohlig-Hellman algorithm
+    dlp = []
+
+    while len(dlp) < count:
+        p = 2 * smooth_number(bits - 1, small, generator) + 1
+
+        if p.bit_length() == bits and primality_testing.miller_rabin_test(p, 20)[0]:
+            g = generator.randrange(2, p - 1)
+            dlp.append((g, pow(g, generator.randrange(1, p - 1), p), p))
+
+    return Workload(bits, primes, semiprimes, smooth, dlp)
+
+
+def smooth_number(bits, small, generator):
+    """Returns a random number of given size, which is a product of the small primes."""
+    while True:
+        n = 1
+
+        while n.bit_length() < bits:
+            n *= generator.choice(small)
+
+        if n.bit_length() == bits:
+            return n
+
+
+def rsa_inputs(work):
+    """Returns the inputs of the RSA operations: message, public key and secret key for each semiprime."""
+    inputs = []
+    generator = random.Random(work.bits)
+
+    for p, q in work.semiprimes:
+        if math.gcd(65537, (p - 1) * (q - 1)) == 1:
+            public_key = (p * q, 65537)
+            inputs.append((generator.randrange(p * q), public_key, rsa.private_key(p, q, 65537)))
+
+    return inputs
+
+
+# for each algorithm: the arguments taken from the workload, the measured call and the default sizes
+ALGORITHMS = {
+    "trial_division": (
+        lambda work: [(p * q,) for p, q in work.semiprimes],
+        factorization.trial_division,
+        (16, 24, 32, 40),
+    ),
+    "miller_rabin_test": (
+        lambda work: [(n,) for n in work.primes],
+        lambda n: primality_testing.miller_rabin_test(n, 20),
+        (64, 256, 1024, 2048),
+    ),
+    "aks_test": (
+        lambda work: [(n,) for n in work.primes],
+        primality_testing.aks_test,
+        (6, 8, 10),
+    ),
+    "squfof": (
+        lambda work: [(p * q,) for p, q in work.semiprimes],
+        factorization.squfof,
+        (24, 32, 48, 64),
+    ),
+    "pollard_rho_method": (
+        lambda work: [(p * q,) for p, q in work.semiprimes],
+        factorization.pollard_rho_method,
+        (24, 32, 48, 64),
+    ),
+    "batch_smoothness_test": (
+        lambda work: [(work.smooth + [p * q for p, q in work.semiprimes], rsa.small_primes(2**10))],
+        factorization.batch_smoothness_test,
+        (64, 256, 1024),
+    ),
+    "silver_pohlig_hellman": (
+        lambda work: work.dlp,
+        discrete_log.silver_pohlig_hellman,
+        (32, 64, 128, 256),
+    ),
+    "rsa_encrypt": (
+        rsa_inputs,
+        lambda message, public_key, _: pow(message, public_key[1], public_key[0]),
+        (512, 1024, 2048),
+    ),
+    "rsa_decrypt": (
+        rsa_inputs,
+        lambda cipher, public_key, secret_key: rsa.private_power(cipher, public_key, secret_key),
+        (512, 1024, 2048),
+    ),
+}
+
+
+def measure(algorithm, work, repetitions=5, warmup=1):
+    """
+    Measures the time of the algorithm on all the inputs of the workload.
+
+    Args:
+        algorithm (str): Name of the algorithm (key of ALGORITHMS).
+        work (Workload): The inputs.
+        repetitions (int, optional): Number of measured runs. Defaults to 5.
+        warmup (int, optional): Number of runs before the measurement. Defaults to 1.
+
+    Raises:
+        ValueError: If the algorithm is unknown.
+
+    Returns:
+        Measurement: Median and minimal time per input (in seconds) of the runs.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm}.")
+
+    inputs_of, function, _ = ALGORITHMS[algorithm]
+    inputs = inputs_of(work)
+
+    for _ in range(warmup):
+        for item in inputs:
+            function(*item)
+
+    times = []
+
+    for _ in range(repetitions):
+        start = time.perf_counter()
+
+        for item in inputs:
+            function(*item)
+
+        times.append((time.perf_counter() - start) / max(1, len(inputs)))
+
+    return Measurement(
+        algorithm, work.bits, statistics.median(times), min(times), repetitions, len(inputs)
+    )
+
+
+def run_suite(algorithms=None, sizes=None, count=4, repetitions=5, warmup=1, seed=0):
+    """
+    Measures the algorithms across the sweep of sizes.
+
+    Args:
+        algorithms (list, optional): Names of the algorithms. Defaults to None (all of ALGORITHMS).
+        sizes (list, optional): Sizes (in bits) for all the algorithms. Defaults to None (sizes of each algorithm).
+        count (int, optional): Number of inputs of each kind and size. Defaults to 4.
+        repetitions (int, optional): Number of measured runs. Defaults to 5.
+        warmup (int, optional): Number of runs before the measurement. Defaults to 1.
+        seed (int, optional): Seed of the workloads. Defaults to 0.
+
+    Yields:
+        Measurement: Result of one algorithm on one size.
+    """
+    workloads = {}
+
+    for algorithm in algorithms or ALGORITHMS:
+        for bits in sizes or ALGORITHMS[algorithm][2]:
+            if bits not in workloads:
+                workloads[bits] = workload(bits, count, seed)
+
+            yield measure(algorithm, workloads[bits], repetitions, warmup)
+
+
+def save_results(results, path):
+    """Saves the measurements to a JSON file, or a CSV file if the path ends by ".csv"."""
+    rows = [result._asdict() for result in results]
+
+    with open(path, "w", newline="") as file:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(file, fieldnames=Measurement._fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, file, indent=2)
+
+
+def load_results(path):
+    """Loads the measurements saved by save_results."""
+    with open(path, newline="") as file:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = json.load(file)
+
+    return [
+        Measurement(
+            row["algorithm"],
+            int(row["bits"]),
+            float(row["median"]),
+            float(row["minimum"]),
+            int(row["repetitions"]),
+            int(row["inputs"]),
+        )
+        for row in rows
+    ]
+
+
+def regressions(results, baseline, threshold=0.1):
+    """
+    Compares the measurements with the baseline.
+
+    Args:
+        results (list): Current measurements.
+        baseline (list): Measurements of the baseline.
+        threshold (float, optional): Allowed relative slowdown of the median. Defaults to 0.1 (10 %).
+
+    Returns:
+        list: Regressions of the measurements slower than the baseline by more than the threshold.
+    """
+    medians = {(result.algorithm, result.bits): result.median for result in baseline}
+    found = []
+
+    for result in results:
+        before = medians.get((result.algorithm, result.bits))
+
+        if before and result.median > before * (1 + threshold):
+            found.append(
+                Regression(result.algorithm, result.bits, before, result.median, result.median / before)
+            )
+
+    return found
+
+
+def main():
+    """Runs the benchmarks given on the command line."""
+    parser = argparse.ArgumentParser(description="Benchmarks of the implemented algorithms.")
+    parser.add_argument("benchmark", choices=["rho_dlog", "rsa_primes", "batch_rsa", "suite"])
+    parser.add_argument("--bits", type=int, nargs="+", default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--algorithms", nargs="+", default=None, choices=list(ALGORITHMS))
+    parser.add_argument("--count", type=int, default=4)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    arguments = parser.parse_args()
+
+    if arguments.benchmark == "rho_dlog":
+        for bits in arguments.bits or [32, 48, 64]:
+            for workers in sorted({1, arguments.workers}):
+                speed = rho_dlog_steps_per_second(
+                    bits, workers, arguments.duration, arguments.seed
+                )
+                print(
+                    f"rho_dlog: {bits:>4} bits, {workers:>3} workers: {speed:>12,.0f} steps per second per core"
+                )
+
+    if arguments.benchmark == "rsa_primes":
+        for bits in arguments.bits or [2048, 4096]:
+            two_primes = None
+
+            for count in (2, 3, 4):
+                speed = rsa_private_operations_per_second(
+                    bits, count, arguments.duration, arguments.seed
+                )
+                two_primes = two_primes or speed
+                print(
+                    f"rsa_primes: {bits:>5} bits, {count} primes: {speed:>10,.1f} operations per second ({speed / two_primes:.2f}x)"
+                )
+
+    if arguments.benchmark == "batch_rsa":
+        for bits in arguments.bits or [1024, 2048]:
+            single, batch, speedup = batch_rsa_speedup(
+                bits, arguments.batch_size, seed=arguments.seed
+            )
+            print(
+                f"batch_rsa: {bits:>5} bits, batch of {arguments.batch_size}: {1000 * single:>8.2f} ms per-item, {1000 * batch:>8.2f} ms batch ({speedup:.2f}x)"
+            )
+
+    if arguments.benchmark == "suite":
+        results = []
+
+        for result in run_suite(
+            arguments.algorithms,
+            arguments.bits,
+            arguments.count,
+            arguments.repetitions,
+            arguments.warmup,
+            0 if arguments.seed is None else arguments.seed,
+        ):
+            results.append(result)
+            print(
+                f"{result.algorithm:>22}: {result.bits:>5} bits: {1000 * result.median:>12.4f} ms per input (min {1000 * result.minimum:.4f} ms)"
+            )
+
+        if arguments.output is not None:
+            save_results(results, arguments.output)
+
+        if arguments.baseline is not None:
+            found = regressions(results, load_results(arguments.baseline), arguments.threshold)
+
+            for regression in found:
+                print(
+                    f"REGRESSION {regression.algorithm}: {regression.bits} bits: {1000 * regression.baseline:.4f} ms -> {1000 * regression.current:.4f} ms ({regression.ratio:.2f}x)"
+                )
+
+            # (a nonzero exit code, so that a script running the suite notices)
+            if found:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import math
+
+import factorization
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# The Chinese remainder theorem (CRT) reconstructs an integer from its residues, that is:
+#
+# For given residues a_1, ..., a_k and pairwise coprime moduli n_1, ..., n_k, find the unique x < n_1 * ... * n_k, that:
+#
+#   x = a_i (mod n_i) for every i
+#
+# Garner's algorithm is used for a few moduli (for example the primes of an RSA modulus), the subproduct tree
+# for many moduli. CRTContext precomputes all the constants that depend on the moduli only, so that many residue
+# vectors can be reconstructed against the same moduli.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [2] Modern Computer Algebra. (2013) ISBN 978-1-107-03903-2.
+# [3] Prime Numbers: A Computational Perspective. (2005) ISBN 978-0-387-25282-7.
+
+
+# [1]
+def garner(residues, moduli):
+    """
+    Finds the unique solution to the system of congruences by Garner's (mixed radix) algorithm.
+
+    Args:
+        residues (list): Residues a_i.
+        moduli (list): Pairwise coprime moduli n_i.
+
+    Returns:
+        int: The unique solution x < n_1 * ... * n_k of the system x = a_i (mod n_i).
+    """
+    return CRTContext(moduli, tree_threshold=math.inf).solve(residues)
+
+
+# [2]
+def tree_crt(residues, moduli):
+    """
+    Finds the unique solution to the system of congruences using the subproduct tree of the moduli.
+
+    Args:
+        residues (list): Residues a_i.
+        moduli (list): Pairwise coprime moduli n_i.
+
+    Returns:
+        int: The unique solution x < n_1 * ... * n_k of the system x = a_i (mod n_i).
+    """
+    return CRTContext(moduli, tree_threshold=0).solve(residues)
+
+
+def chinese_remainder_theorem(congruences):
+    """
+    Finds the unique solution to the system of congruences.
+
+    Args:
+        congruences (list): List of pairs (a_i, n_i) which represent the system of congruences in form: x = a_i (mod n_i).
+
+    Returns:
+        int: The unique solution x to the system of congruences in form: x = a_i (mod n_i).
+    """
+    residues = [a_i for a_i, _ in congruences]
+    moduli = [n_i for _, n_i in congruences]
+
+    return CRTContext(moduli).solve(residues)
+
+
+class CRTContext:
+    """
+    Precomputed constants of the Chinese remainder theorem for fixed pairwise coprime moduli.
+
+    Attributes:
+        moduli (list): Pairwise coprime moduli n_i.
+        modulus (int): Product of all the moduli.
+        tree (list): Levels of the product tree of the moduli. (None if Garner's algorithm is used.)
+        inverses (list): For Garner's algorithm the inverses of n_1 * ... * n_(i-1) mod n_i,
+            for the tree the inverses of modulus / n_i mod n_i.
+    """
+
+    def __init__(self, moduli, tree_threshold=16):
+        """
+        Args:
+            moduli (list): Pairwise coprime moduli n_i.
+            tree_threshold (int, optional): The subproduct tree is used for more moduli than this. Defaults to 16.
+
+        Raises:
+            ValueError: If the moduli are not pairwise coprime, the solution is not unique.
+        """
+        self.moduli = list(moduli)
+
+        if len(self.moduli) > tree_threshold:
+            self.tree = factorization.product_tree(self.moduli)
+            self.modulus = self.tree[-1][0]
+
+            # (modulus mod n_i^2) / n_i = (modulus / n_i) mod n_i
+            squares = factorization.product_tree([n_i * n_i for n_i in self.moduli])
+            remainders = factorization.remainder_tree(self.modulus, squares)
+            cofactors = [r // n_i for r, n_i in zip(remainders, self.moduli)]
+        else:
+            self.tree = None
+            self.modulus = 1
+            cofactors = []
+
+            for n_i in self.moduli:
+                cofactors.append(self.modulus % n_i)
+                self.modulus *= n_i
+
+        try:
+            self.inverses = [pow(c, -1, n_i) for c, n_i in zip(cofactors, self.moduli)]
+        except ValueError:
+            raise ValueError("The moduli must be pairwise coprime.") from None
+
+    def solve(self, residues):
+        """
+        Finds the unique solution to the system of congruences x = a_i (mod n_i).
+
+        Args:
+            residues (list): Residues a_i (in the same order as the moduli).
+
+        Returns:
+            int: The unique solution x < modulus.
+        """
+        if self.tree is not None:
+            return self.tree_solve(residues)
+
+        # mixed radix representation x = v_1 + v_2 * n_1 + v_3 * n_1 * n_2 + ...
+        x = 0
+        radix = 1
+
+        for a_i, n_i, inverse in zip(residues, self.moduli, self.inverses):
+            v_i = (a_i - x) * inverse % n_i
+            x += v_i * radix
+            radix *= n_i
+
+        return x
+
+    def tree_solve(self, residues):
+        """Combines the residues up the product tree of the moduli. (Requires the tree to be precomputed.)"""
+        # x = sum of c_i * modulus / n_i, where c_i = a_i * (modulus / n_i)^(-1) mod n_i
+        values = [
+            a_i * inverse % n_i
+            for a_i, n_i, inverse in zip(residues, self.moduli, self.inverses)
+        ]
+
+        for level in self.tree[:-1]:
+            combined = []
+
+            for i in range(0, len(values) - 1, 2):
+                combined.append(values[i] * level[i + 1] + values[i + 1] * level[i])
+
+            if len(values) % 2:
+                combined.append(values[-1])
+
+            values = combined
+
+        return values[0] % self.modulus
+
+    def solve_many(self, residue_vectors):
+        """Finds the solutions for all the given residue vectors. (Returns the list of solutions in the same order.)"""
+        return [self.solve(residues) for residues in residue_vectors]
@@ -1,6 +1,21 @@
-from functools import reduce
-
-import factorization
+import array
+import functools
+import math
+import mmap
+import os
+import random
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import chinese_remainder
+import multiplicative_group
+import primality_testing
+
+# the full tables of discrete logarithms (see dlog_table) are built with NumPy, if it is installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 # Use of prime numbers in data encryption
@@ -26,6 +41,9 @@ import factorization
 # [1] A Computational Introduction to Number Theory and Algebra. (2009) (https://www.shoup.net/ntb/)
 # [2] A Graduate Course in Applied Cryptography. (2023) (http://toc.cryptobook.us/)
 # [3] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [4] Speeding Up Pollard's Rho Method for Computing Discrete Logarithms. (1998) (https://doi.org/10.1007/BFb0054871)
+# [5] Parallel Collision Search with Cryptanalytic Applications. (1999) (https://doi.org/10.1007/PL00003816)
+# [6] Monte Carlo Methods for Index Computation (mod p). (1978) (https://doi.org/10.1090/S0025-5718-1978-0491431-9)
 
 
 # [1]
@@ -63,6 +81,674 @@ def brute_force_dlog(generator, result, modulus):
     return None
 
 
+# [3]
+def baby_step_giant_step(generator, result, modulus, order=None, memory_bound=2**20):
+    """
+    Solves the DLP in a group of the given order using the baby-step giant-step algorithm.
+    (At most sqrt(order) multiplications are done in each of the two phases.)
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+        order (int, optional): Order of the group generated by generator. Defaults to None (modulus - 1).
+        memory_bound (int, optional): Maximal number of baby steps stored in the table.
+            If sqrt(order) is larger, fewer baby steps and more giant steps are done. Defaults to 2**20.
+
+    Raises:
+        ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+    Returns:
+        int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If DLP has no solution for given input.
+    """
+
+    if result <= 0:
+        raise ValueError("Result must be greater than zero.")
+
+    if order is None:
+        order = modulus - 1
+
+    table, stride = baby_steps(generator, modulus, order, memory_bound)
+
+    return giant_steps(table, stride, generator, result, modulus, order)
+
+
+# [3]
+def baby_steps(generator, modulus, order, memory_bound=2**20):
+    """
+    Computes the table of baby steps for the baby-step giant-step algorithm.
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        modulus (int): Represents the modulus of the DLP.
+        order (int): Order of the group generated by generator.
+        memory_bound (int, optional): Maximal number of baby steps stored in the table. Defaults to 2**20.
+
+    Returns:
+        tuple: The table {generator^j: j} for 0 <= j < stride, and the stride of the giant steps.
+    """
+    stride = max(1, min(math.isqrt(order - 1) + 1, memory_bound))
+
+    table = {}
+    current = 1
+
+    for j in range(stride):
+        # keep the least exponent
+        table.setdefault(current, j)
+        current = current * generator % modulus
+
+    return table, stride
+
+
+# [3]
+def giant_steps(table, stride, generator, result, modulus, order):
+    """
+    Finds the least exponent e < order, for which generator^e = result (mod modulus), using the table of baby steps.
+
+    Args:
+        table (dict): The table {generator^j: j} returned by baby_steps.
+        stride (int): The stride of the giant steps returned by baby_steps.
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP.
+        modulus (int): Represents the modulus of the DLP.
+        order (int): Order of the group generated by generator.
+
+    Returns:
+        int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If DLP has no solution for given input.
+    """
+    # result * generator^(-i * stride) for i = 0, 1, ...
+    giant_step = pow(generator, -stride, modulus)
+    current = result % modulus
+
+    for i in range(-(-order // stride)):
+        if current in table:
+            return i * stride + table[current]
+
+        current = current * giant_step % modulus
+
+    return None
+
+
+# [3], [4]
+def pollard_rho_dlog(generator, result, modulus, order, partitions=20, attempts=10):
+    """
+    Solves the DLP in a group of prime order using the Pollard rho method with r-adding walks.
+    (Uses constant memory, the expected number of steps is about sqrt(order).)
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+        order (int): Prime order of the group generated by generator.
+        partitions (int, optional): Number of multipliers of the r-adding walk. Defaults to 20.
+        attempts (int, optional): Number of walks tried before giving up. Defaults to 10.
+
+    Raises:
+        ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+    Returns:
+        int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If no solution was found. (For example, if result is not in the group generated by generator.)
+    """
+
+    if result <= 0:
+        raise ValueError("Result must be greater than zero.")
+
+    result %= modulus
+
+    for _ in range(attempts):
+        multipliers = adding_walk_multipliers(
+            generator, result, modulus, order, partitions
+        )
+
+        # x = generator^a * result^b
+        a, b = random.randrange(order), random.randrange(order)
+        x = pow(generator, a, modulus) * pow(result, b, modulus) % modulus
+
+        # Brent's cycle detection
+        tortoise = (x, a, b)
+        power, length = 1, 0
+
+        while True:
+            multiplier, a_step, b_step = multipliers[x % partitions]
+            x = x * multiplier % modulus
+            a += a_step
+            b += b_step
+            length += 1
+
+            if x == tortoise[0]:
+                break
+
+            if length == power:
+                tortoise = (x, a, b)
+                power *= 2
+                length = 0
+
+        exponent = collision_exponent(tortoise, (x, a, b), order)
+
+        if exponent is not None and pow(generator, exponent, modulus) == result:
+            return exponent
+
+    return None
+
+
+# [4], [5]
+def parallel_rho_dlog(
+    generator,
+    result,
+    modulus,
+    order,
+    workers=None,
+    partitions=20,
+    distinguished_bits=None,
+    batch_points=16,
+    steps_bound=None,
+):
+    """
+    Solves the DLP in a group of prime order using the parallel Pollard rho method with distinguished points.
+    Worker processes run r-adding walks and report the distinguished points to a central collision table.
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+        order (int): Prime order of the group generated by generator.
+        workers (int, optional): Number of worker processes. Defaults to None (the number of CPUs).
+        partitions (int, optional): Number of multipliers of the r-adding walk. Defaults to 20.
+        distinguished_bits (int, optional): Number of low zero bits of a distinguished point. Defaults to None (chosen by the order).
+        batch_points (int, optional): Number of distinguished points a worker collects before reporting them. Defaults to 16.
+        steps_bound (int, optional): Maximal total number of walk steps. Defaults to None (chosen by the order).
+
+    Raises:
+        ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+    Returns:
+        int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If no solution was found within steps_bound steps.
+    """
+
+    if result <= 0:
+        raise ValueError("Result must be greater than zero.")
+
+    result %= modulus
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if distinguished_bits is None:
+        distinguished_bits = max(0, order.bit_length() // 4 - 2)
+
+    # all the workers must walk the same way, so that their walks can collide
+    multipliers = adding_walk_multipliers(generator, result, modulus, order, partitions)
+    walk = (generator, result, modulus, order, multipliers, distinguished_bits)
+
+    collision_table = {}
+
+    # with no solution (result not generated by generator) the walks would run forever
+    if steps_bound is None:
+        steps_bound = 64 * math.isqrt(order) + (100 << distinguished_bits)
+
+    steps = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {
+            executor.submit(distinguished_points, *walk, batch_points)
+            for _ in range(workers)
+        }
+
+        while running and steps < steps_bound:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                points, batch_steps = future.result()
+                steps += batch_steps
+
+                for x, a, b in points:
+                    if x not in collision_table:
+                        collision_table[x] = (a, b)
+                        continue
+
+                    exponent = collision_exponent(
+                        (x, *collision_table[x]), (x, a, b), order
+                    )
+
+                    if (
+                        exponent is not None
+                        and pow(generator, exponent, modulus) == result
+                    ):
+                        for other in running:
+                            other.cancel()
+                        return exponent
+
+                running.add(executor.submit(distinguished_points, *walk, batch_points))
+
+        for other in running:
+            other.cancel()
+
+    return None
+
+
+def distinguished_points(
+    generator, result, modulus, order, multipliers, distinguished_bits, count
+):
+    """
+    Runs r-adding walks from random starting points until given count of distinguished points is found. (Used by parallel_rho_dlog.)
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP.
+        modulus (int): Represents the modulus of the DLP.
+        order (int): Prime order of the group generated by generator.
+        multipliers (list): Multipliers of the walk returned by adding_walk_multipliers.
+        distinguished_bits (int): Number of low zero bits of a distinguished point.
+        count (int): Number of distinguished points to find.
+
+    Returns:
+        tuple: List of distinguished points (x, a, b), where x = generator^a * result^b, and the number of steps done.
+    """
+    partitions = len(multipliers)
+    mask = (1 << distinguished_bits) - 1
+
+    # walks that are too long have probably fallen into a cycle
+    walk_bound = 20 << distinguished_bits
+
+    points = []
+    steps = 0
+
+    while len(points) < count:
+        a, b = random.randrange(order), random.randrange(order)
+        x = pow(generator, a, modulus) * pow(result, b, modulus) % modulus
+
+        for _ in range(walk_bound):
+            multiplier, a_step, b_step = multipliers[x % partitions]
+            x = x * multiplier % modulus
+            a += a_step
+            b += b_step
+            steps += 1
+
+            if x & mask == 0:
+                points.append((x, a % order, b % order))
+                break
+
+    return points, steps
+
+
+# [4]
+def adding_walk_multipliers(generator, result, modulus, order, partitions=20):
+    """Returns random multipliers generator^a * result^b of the r-adding walk as triples (multiplier, a, b)."""
+    multipliers = []
+
+    for _ in range(partitions):
+        a, b = random.randrange(order), random.randrange(order)
+        multiplier = pow(generator, a, modulus) * pow(result, b, modulus) % modulus
+        multipliers.append((multiplier, a, b))
+
+    return multipliers
+
+
+def collision_exponent(first, second, order):
+    """
+    Computes the exponent e from a collision generator^a1 * result^b1 = generator^a2 * result^b2.
+
+    Args:
+        first (tuple): The triple (x, a1, b1).
+        second (tuple): The triple (x, a2, b2).
+        order (int): Prime order of the group generated by generator.
+
+    Returns:
+        int: Number e = (a1 - a2) / (b2 - b1) (mod order).
+        None: If the collision is useless (b1 = b2 (mod order)).
+    """
+    _, a_1, b_1 = first
+    _, a_2, b_2 = second
+
+    if (b_2 - b_1) % order == 0:
+        return None
+
+    return (a_1 - a_2) * pow(b_2 - b_1, -1, order) % order
+
+
+# [6]
+def interval_dlog(generator, result, modulus, lo, hi, workers=1, attempts=10):
+    """
+    Solves the DLP for exponents from the interval [lo, hi] using Pollard's kangaroo (lambda) method.
+    (Uses constant memory, the expected number of steps is about sqrt(hi - lo).)
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+        lo (int): The smallest possible exponent.
+        hi (int): The largest possible exponent.
+        workers (int, optional): Number of processes running the kangaroos. (1 runs the serial method.) Defaults to 1.
+        attempts (int, optional): Number of wild kangaroos of the serial method tried before giving up. Defaults to 10.
+
+    Raises:
+        ValueError: If result is less or equal to zero, DLP cannot be solved.
+        ValueError: If the interval is empty.
+
+    Returns:
+        int: Number e from [lo, hi], which satisfies the equation generator^e = result (mod modulus).
+        None: If no solution was found.
+    """
+
+    if result <= 0:
+        raise ValueError("Result must be greater than zero.")
+
+    if hi < lo:
+        raise ValueError("Interval [lo, hi] must not be empty.")
+
+    result %= modulus
+    width = hi - lo
+
+    # short intervals are simply searched through
+    if width < 64:
+        current = pow(generator, lo, modulus)
+
+        for exponent in range(lo, hi + 1):
+            if current == result:
+                return exponent
+            current = current * generator % modulus
+
+        return None
+
+    if workers > 1:
+        return parallel_kangaroo_dlog(generator, result, modulus, lo, hi, workers)
+
+    jumps = kangaroo_jumps(generator, modulus, math.isqrt(width) // 2)
+    partitions = len(jumps)
+
+    for _ in range(attempts):
+        salt = random.getrandbits(32)
+
+        # the tame kangaroo starts at hi and sets a trap at the end of its trail
+        tame = pow(generator, hi, modulus)
+        tame_distance = 0
+
+        for _ in range(2 * math.isqrt(width)):
+            jump, multiplier = jumps[(tame ^ salt) % partitions]
+            tame = tame * multiplier % modulus
+            tame_distance += jump
+
+        # the wild kangaroo starts at the unknown exponent (<= hi), it may land in the trap
+        wild = result
+        wild_distance = 0
+
+        while wild_distance <= width + tame_distance:
+            if wild == tame:
+                exponent = hi + tame_distance - wild_distance
+
+                if lo <= exponent and pow(generator, exponent, modulus) == result:
+                    return exponent
+                break
+
+            jump, multiplier = jumps[(wild ^ salt) % partitions]
+            wild = wild * multiplier % modulus
+            wild_distance += jump
+
+    return None
+
+
+# [5], [6]
+def parallel_kangaroo_dlog(
+    generator, result, modulus, lo, hi, workers=None, distinguished_bits=None
+):
+    """
+    Solves the DLP for exponents from the interval [lo, hi] using the parallel kangaroo method with distinguished points.
+    Herds of tame and wild kangaroos jump in worker processes and report distinguished points to a central table.
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+        lo (int): The smallest possible exponent.
+        hi (int): The largest possible exponent.
+        workers (int, optional): Number of worker processes. Defaults to None (the number of CPUs).
+        distinguished_bits (int, optional): Number of low zero bits of a distinguished point. Defaults to None (chosen by the interval).
+
+    Returns:
+        int: Number e from [lo, hi], which satisfies the equation generator^e = result (mod modulus).
+        None: If no solution was found.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    width = hi - lo
+    herd = max(1, workers // 2)
+
+    if distinguished_bits is None:
+        distinguished_bits = max(0, width.bit_length() // 4 - 2)
+
+    # the jumps must be the same for all the kangaroos
+    jumps = kangaroo_jumps(generator, modulus, herd * math.isqrt(width) // 4)
+    spacing = max(1, math.isqrt(width) // (4 * herd))
+
+    def new_kangaroo(kind):
+        # tame kangaroos start around the middle of the interval, the wild ones around the unknown exponent
+        offset = random.randrange(herd * spacing)
+
+        if kind == "tame":
+            offset += lo + width // 2
+            return kind, offset, pow(generator, offset, modulus)
+
+        return kind, offset, result * pow(generator, offset, modulus) % modulus
+
+    # x -> (kind, exponent), tame points are generator^exponent, wild ones result * generator^exponent
+    collision_table = {}
+
+    # with no solution in the interval the kangaroos would jump forever
+    steps_bound = 64 * herd * math.isqrt(width) + (100 << distinguished_bits)
+    steps = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+
+        def start_trail(kind, offset, x):
+            future = executor.submit(
+                kangaroo_trail, modulus, jumps, x, distinguished_bits, 16
+            )
+            running[future] = (kind, offset)
+
+        for index in range(workers):
+            start_trail(*new_kangaroo("tame" if index % 2 == 0 else "wild"))
+
+        while running and steps < steps_bound:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                kind, offset = running.pop(future)
+                points, x, distance, trail_steps = future.result()
+                steps += trail_steps
+
+                for point, point_distance in points:
+                    exponent = offset + point_distance
+
+                    if point not in collision_table:
+                        collision_table[point] = (kind, exponent)
+                        continue
+
+                    other_kind, other_exponent = collision_table[point]
+
+                    # kangaroos of the same herd would follow the same trail from now on
+                    if other_kind == kind:
+                        break
+
+                    if kind == "tame":
+                        solution = exponent - other_exponent
+                    else:
+                        solution = other_exponent - exponent
+
+                    if lo <= solution <= hi and pow(generator, solution, modulus) == result:
+                        for other in running:
+                            other.cancel()
+                        return solution
+                else:
+                    # the kangaroo continues from the end of its trail
+                    start_trail(kind, offset + distance, x)
+                    continue
+
+                start_trail(*new_kangaroo(kind))
+
+        for other in running:
+            other.cancel()
+
+    return None
+
+
+def kangaroo_trail(modulus, jumps, x, distinguished_bits, count):
+    """
+    Lets a kangaroo jump until it finds given count of distinguished points. (Used by parallel_kangaroo_dlog.)
+
+    Args:
+        modulus (int): Represents the modulus of the DLP.
+        jumps (list): Jumps of the kangaroos returned by kangaroo_jumps.
+        x (int): Starting position of the kangaroo.
+        distinguished_bits (int): Number of low zero bits of a distinguished point.
+        count (int): Number of distinguished points to find.
+
+    Returns:
+        tuple: List of distinguished points (x, distance from the start), the final position, the final distance and the number of jumps.
+    """
+    partitions = len(jumps)
+    mask = (1 << distinguished_bits) - 1
+
+    points = []
+    distance = 0
+    steps = 0
+
+    while len(points) < count:
+        jump, multiplier = jumps[x % partitions]
+        x = x * multiplier % modulus
+        distance += jump
+        steps += 1
+
+        if x & mask == 0:
+            points.append((x, distance))
+
+    return points, x, distance, steps
+
+
+# [6]
+def kangaroo_jumps(generator, modulus, mean_jump):
+    """Returns the jumps (2^i, generator^(2^i)) of the kangaroos, so that their average length is about mean_jump."""
+    count = 1
+    while (2**count - 1) / count < mean_jump:
+        count += 1
+
+    return [(2**i, pow(generator, 2**i, modulus)) for i in range(count)]
+
+
+@functools.lru_cache(maxsize=16)
+def dlog_table(generator, modulus):
+    """
+    Builds the table of discrete logarithms of all the residues mod modulus in one incremental pass.
+    (Mind that the table has modulus entries of 8 bytes, it is meant for small moduli. Recently used tables are cached.)
+
+    Args:
+        generator (int): Represents the base of the DLPs.
+        modulus (int): Represents the modulus of the DLPs.
+
+    Returns:
+        array: The table, in which table[residue] is the least e with generator^e = residue (mod modulus), or -1 if there is no such e.
+            (A read-only NumPy array, if NumPy is installed, a read-only memoryview of array.array otherwise.
+            The cached table is shared by all the callers, so it must not be changed.)
+    """
+    generator %= modulus
+
+    # the products of two residues must fit into 64 bits
+    if numpy is not None and modulus < 2**31:
+        # generator^(k * stride + j) for all the j at once
+        stride = math.isqrt(modulus) + 1
+        baby_steps = numpy.empty(stride, dtype=numpy.int64)
+
+        current = 1
+        for j in range(stride):
+            baby_steps[j] = current
+            current = current * generator % modulus
+
+        table = numpy.full(modulus, modulus, dtype=numpy.int64)
+        exponents = numpy.arange(stride, dtype=numpy.int64)
+        giant_step = current
+        factor = 1
+
+        for start in range(0, modulus, stride):
+            # the least exponent is kept for the residues that repeat
+            numpy.minimum.at(table, baby_steps * factor % modulus, exponents + start)
+            factor = factor * giant_step % modulus
+
+        table[table == modulus] = -1
+        table.flags.writeable = False
+
+        return table
+
+    table = array.array("q", [-1]) * modulus
+
+    # every power is one multiplication from the previous one
+    current, exponent = 1 % modulus, 0
+
+    while table[current] == -1:
+        table[current] = exponent
+        current = current * generator % modulus
+        exponent += 1
+
+    return memoryview(table).toreadonly()
+
+
+def table_dlog(generator, result, modulus):
+    """
+    Solves the DLP by a single read from the (cached) table of all discrete logarithms. (See dlog_table.)
+
+    Args:
+        generator (int): Represents the base of the DLP.
+        result (int): Represents the result of the DLP. (Must be greater than 0.)
+        modulus (int): Represents the modulus of the DLP.
+
+    Raises:
+        ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+    Returns:
+        int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If DLP has no solution for given input.
+    """
+
+    if result <= 0:
+        raise ValueError("Result must be greater than zero.")
+
+    exponent = int(dlog_table(generator, modulus)[result % modulus])
+
+    if exponent == -1:
+        return None
+
+    return exponent
+
+
+def save_dlog_table(table, path):
+    """Saves the table of discrete logarithms to the file with given path. (As raw 64-bit integers in the native byte order.)"""
+    with open(path, "wb") as file:
+        file.write(memoryview(table).cast("B"))
+
+
+def load_dlog_table(path):
+    """
+    Maps the table of discrete logarithms saved by save_dlog_table into memory. (The file is not read at once, only the accessed entries.)
+
+    Args:
+        path (str): Path to the saved table.
+
+    Returns:
+        array: The table, in which table[residue] is the least e with generator^e = residue (mod modulus), or -1 if there is no such e.
+    """
+    if numpy is not None:
+        return numpy.memmap(path, dtype=numpy.int64, mode="r")
+
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return memoryview(mapping).cast("q")
+
+
 # [1]
 def recursive_dlog(generator, result, q, y, p):
     """
@@ -84,9 +770,17 @@ def recursive_dlog(generator, result, q, y, p):
     # make sure the result is in range
     result %= p
 
-    # base case, basic algorithm is used
+    # base case, the generator has order q
+    # (the basic algorithm is kept for moduli, in which generator is not invertible)
     if y == 1:
-        return brute_force_dlog(generator, result, p)
+        if math.gcd(generator, p) != 1:
+            return brute_force_dlog(generator, result, p)
+
+        # the table of baby steps would be too large
+        if q > 2**40 and primality_testing.miller_rabin_test(q, 20)[0]:
+            return pollard_rho_dlog(generator, result, p, order=q)
+
+        return baby_step_giant_step(generator, result, p, order=q)
 
     # reduce the group order
     z = y // 2
@@ -126,37 +820,184 @@ def silver_pohlig_hellman(generator, result, modulus, prime_factors=None):
 
     Returns:
         int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        None: If DLP has no solution for given input.
     """
 
-    # if factorization is not given, find it using factorization.py module
-    if prime_factors is None:
-        prime_factors = factorization.trial_division(modulus - 1)
+    # the group context is built for a single result here, see DlogGroup for solving many of them
+    return DlogGroup(generator, modulus, prime_factors).solve(result)
 
-    factors_with_count = [[x, prime_factors.count(x)] for x in set(prime_factors)]
 
-    congruences = []
+# [2], [3]
+class DlogGroup:
+    """
+    Precomputed context for solving many DLPs with the same generator and modulus by the Silver-Pohlig-Hellman algorithm.
+    The group order is factored once, the subgroup generators and the tables of baby steps are computed once for each prime power.
+
+    Attributes:
+        generator (int): Represents the base of the DLPs.
+        modulus (int): Represents the modulus of the DLPs.
+        order (int): Order of the group generated by generator. (modulus - 1, if it could not be computed.)
+        factors (dict): Factorization of the order as {q_i: e_i}.
+        generator_order (int): Multiplicative order of generator. (None if it could not be computed from the factors.)
+        subgroups (dict): For each q_i the tuple (cofactor, generator_i, inverse of generator_i, gamma_i, baby steps).
+            (generator_i generates the subgroup of order q_i^e_i, gamma_i the subgroup of order q_i.)
+        crt (CRTContext): Precomputed Chinese remainder theorem for the moduli q_i^e_i.
+    """
 
-    for q_i, e_i in factors_with_count:
-        new_order = int((modulus - 1) / pow(q_i, e_i))
+    def __init__(self, generator, modulus, prime_factors=None, memory_bound=2**20):
+        """
+        Args:
+            generator (int): Represents the base of the DLPs.
+            modulus (int): Represents the modulus of the DLPs. Prime values for modulus are recommended.
+            prime_factors (list, optional): Factorization of the group order (modulus - 1).
+            memory_bound (int, optional): Maximal number of baby steps stored for each prime. Defaults to 2**20.
+        """
+        self.generator = generator
+        self.modulus = modulus
+        self.order = modulus - 1
+
+        # if factorization is not given, find it (see multiplicative_group.factor_order)
+        if prime_factors is None:
+            prime_factors = multiplicative_group.factor_order(self.order)
+
+        self.factors = Counter(prime_factors)
+        self.subgroups = {}
+
+        invertible = math.gcd(generator, modulus) == 1
+
+        # if generator is not a primitive root, the DLPs are solved in the smaller group it generates
+        # (its order can only be found, if it divides modulus - 1)
+        self.generator_order = None
+        if invertible and pow(generator, self.order, modulus) == 1:
+            self.generator_order = multiplicative_group.multiplicative_order(
+                generator, modulus, prime_factors
+            )
+            self.order = self.generator_order
 
-        # calculate new generator and result of the new group
-        generator_i = pow(generator, new_order, modulus)
-        result_i = pow(result, new_order, modulus)
+            for q_i in list(self.factors):
+                while self.factors[q_i] and self.order % q_i ** self.factors[q_i] != 0:
+                    self.factors[q_i] -= 1
 
-        # computing DLP in group of order q_i^e_i
-        congruences.append(
-            [recursive_dlog(generator_i, result_i, q_i, e_i, modulus), q_i**e_i]
-        )
+            self.factors = +self.factors
+
+        for q_i, e_i in self.factors.items():
+            cofactor = self.order // q_i**e_i
+            generator_i = pow(generator, cofactor, modulus)
+
+            # (the recursive algorithm is used for generators that are not invertible)
+            if not invertible:
+                self.subgroups[q_i] = (cofactor, generator_i, None, None, None)
+                continue
+
+            gamma_i = pow(generator_i, q_i ** (e_i - 1), modulus)
+
+            # for large primes, the Pollard rho method is used instead of a table
+            if q_i > 2**40 and primality_testing.miller_rabin_test(q_i, 20)[0]:
+                steps = None
+            else:
+                steps = baby_steps(gamma_i, modulus, q_i, memory_bound)
 
-    solution = chinese_remainder_theorem(congruences)
+            self.subgroups[q_i] = (
+                cofactor,
+                generator_i,
+                pow(generator_i, -1, modulus),
+                gamma_i,
+                steps,
+            )
 
-    return solution
+        self.crt = chinese_remainder.CRTContext([q_i**e_i for q_i, e_i in self.factors.items()])
+
+    def solve(self, result):
+        """
+        Solves the DLP generator^e = result (mod modulus).
+
+        Args:
+            result (int): Represents the result of the DLP. (Must be greater than 0.)
+
+        Raises:
+            ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+        Returns:
+            int: Number e, which satisfies the equation generator^e = result (mod modulus).
+            None: If DLP has no solution for given input.
+        """
+        if result <= 0:
+            raise ValueError("Result must be greater than zero.")
+
+        if (
+            self.generator_order is not None
+            and pow(result, self.generator_order, self.modulus) != 1
+        ):
+            return None
+
+        residues = []
+
+        for q_i in self.factors:
+            cofactor = self.subgroups[q_i][0]
+
+            # computing DLP in group of order q_i^e_i
+            x_i = self.prime_power_dlog(q_i, pow(result, cofactor, self.modulus))
+
+            if x_i is None:
+                return None
+
+            residues.append(x_i)
+
+        return self.crt.solve(residues)
+
+    def solve_many(self, results):
+        """Solves the DLPs for all the given results. (Returns the list of exponents in the same order.)"""
+        return [self.solve(result) for result in results]
+
+    def prime_power_dlog(self, q, result):
+        """
+        Solves the DLP in the subgroup of order q^e one digit (in base q) of the exponent at a time.
+
+        Args:
+            q (int): Prime factor of the group order.
+            result (int): Represents the result of the DLP in the subgroup.
+
+        Returns:
+            int: Number x < q^e, which satisfies the equation generator_i^x = result (mod modulus).
+            None: If DLP has no solution for given input.
+        """
+        e = self.factors[q]
+        _, generator_i, inverse, gamma, steps = self.subgroups[q]
+
+        if result == 1:
+            return 0
+
+        if inverse is None:
+            return recursive_dlog(generator_i, result, q, e, self.modulus)
+
+        x = 0
+
+        for k in range(e):
+            # (generator_i^(-x) * result)^(q^(e-1-k)) lies in the subgroup of order q
+            h_k = pow(
+                pow(inverse, x, self.modulus) * result, q ** (e - 1 - k), self.modulus
+            )
+
+            if h_k == 1:
+                continue
+
+            if steps is None:
+                d_k = pollard_rho_dlog(gamma, h_k, self.modulus, q)
+            else:
+                table, stride = steps
+                d_k = giant_steps(table, stride, gamma, h_k, self.modulus, q)
+
+            if d_k is None:
+                return None
+
+            x += d_k * q**k
+
+        return x
 
 
-# [3]
 def chinese_remainder_theorem(congruences):
     """
-    Finds the unique solution to the system of congruences.
+    Finds the unique solution to the system of congruences. (See chinese_remainder.py module.)
 
     Args:
         congruences (list): List of pairs (x_i, n_i) which represent the system of congruences in form: x \equiv a_i (mod n_i).
@@ -164,18 +1005,4 @@ def chinese_remainder_theorem(congruences):
     Returns:
         int: The unique solution x to the system of congruences in form: x \equiv a_i (mod n_i).
     """
-    # product of all moduli
-    total_modulus = reduce(lambda x, y: x * y, [pair[1] for pair in congruences])
-
-    # Finds the solution (mod total_modulus)
-    x = 0
-
-    for a_i, n_i in congruences:
-        N_i = total_modulus // n_i
-
-        # multiplicative inverse
-        M_i = pow(N_i, -1, n_i)
-
-        x += a_i * M_i * N_i
-
-    return x % total_modulus
+    return chinese_remainder.chinese_remainder_theorem(congruences)
@@ -1,9 +1,17 @@
 import math
 
+import batch_rsa
+import chinese_remainder
 import factorization
+import factoring_jobs
 import discrete_log
+import index_calculus
+import key_pool
+import key_store
+import multiplicative_group
 import primality_testing
 import rsa
+import rsa_stream
 
 
 # Use of prime numbers in data encryption
@@ -53,6 +61,94 @@ import rsa
 #     assert pow(generator, brute_force_e, modulus) == result % modulus
 
 
+# BABY-STEP GIANT-STEP
+# --------------------
+
+# generator = 3
+# result = 29517
+# modulus = 1234577
+# order = None
+
+# generator = 17
+# result = 2
+# modulus = 8503057
+# order = None
+
+# TEST
+# bsgs_e = discrete_log.baby_step_giant_step(generator, result, modulus, order)
+# print(bsgs_e)
+
+# if bsgs_e is not None:
+#     assert pow(generator, bsgs_e, modulus) == result % modulus
+
+
+# POLLARD RHO FOR DLP
+# -------------------
+
+# subgroup of prime order 12607591214899 of Z*504303648595961
+# generator = pow(3, 40, 504303648595961)
+# result = pow(generator, 123456789123, 504303648595961)
+# modulus = 504303648595961
+# order = 12607591214899
+
+# TEST
+# rho_e = discrete_log.pollard_rho_dlog(generator, result, modulus, order)
+# print(rho_e)
+
+# if __name__ == "__main__":
+#     rho_e = discrete_log.parallel_rho_dlog(generator, result, modulus, order, workers=4)
+#     print(rho_e)
+
+# if rho_e is not None:
+#     assert pow(generator, rho_e, modulus) == result % modulus
+
+
+# KANGAROO (INTERVAL DLOG)
+# ------------------------
+
+# generator = 5
+# result = pow(5, 1234567, 1000000007)
+# modulus = 1000000007
+# lo = 10**6
+# hi = 2 * 10**6
+
+# generator = 3
+# result = pow(3, 10**6 + 987654321012, 2**127 - 1)
+# modulus = 2**127 - 1
+# lo = 10**6
+# hi = 10**6 + 10**12
+
+# TEST
+# interval_e = discrete_log.interval_dlog(generator, result, modulus, lo, hi)
+# print(interval_e)
+
+# if __name__ == "__main__":
+#     interval_e = discrete_log.interval_dlog(generator, result, modulus, lo, hi, workers=4)
+#     print(interval_e)
+
+# if interval_e is not None:
+#     assert lo <= interval_e <= hi
+#     assert pow(generator, interval_e, modulus) == result % modulus
+
+
+# FULL TABLE OF DISCRETE LOGS (SMALL MODULI)
+# ------------------------------------------
+
+# generator = 3
+# results = [29517, 2, 1234576]
+# modulus = 1234577
+
+# TEST
+# for result in results:
+#     table_e = discrete_log.table_dlog(generator, result, modulus)
+#     print(table_e)
+#     assert pow(generator, table_e, modulus) == result % modulus
+
+# discrete_log.save_dlog_table(discrete_log.dlog_table(generator, modulus), "table.bin")
+# table = discrete_log.load_dlog_table("table.bin")
+# assert pow(generator, int(table[29517]), modulus) == 29517
+
+
 # RECURSIVE DISCRETE LOG
 # ----------------------
 
@@ -131,6 +227,63 @@ import rsa
 #     assert result % modulus == pow(generator, sph_e, modulus)
 
 
+# GROUP CONTEXT (MANY DLPs IN ONE GROUP)
+# -------------------------------------
+
+# generator = 5
+# results = [2, 3, 123456789, 987654321]
+# modulus = 1000000007
+
+# TEST
+# group = discrete_log.DlogGroup(generator, modulus)
+# exponents = group.solve_many(results)
+# print(exponents)
+
+# for e, result in zip(exponents, results):
+#     assert pow(generator, e, modulus) == result % modulus
+
+
+# INDEX CALCULUS
+# --------------
+
+# safe prime modulus (modulus - 1 = 2 * 549755814221), 2 is a primitive root
+# generator = 2
+# result = 123456789
+# modulus = 1099511628443
+
+# TEST
+# precomputation = index_calculus.IndexCalculus(generator, modulus)
+# precomputation.precompute()
+# precomputation.save("logarithms.json")
+
+# precomputation = index_calculus.IndexCalculus.load("logarithms.json")
+# index_e = precomputation.log(result)
+# print(index_e)
+# assert pow(generator, index_e, modulus) == result % modulus
+
+
+# CHINESE REMAINDER THEOREM
+# -------------------------
+
+# residues = [2, 3, 2]
+# moduli = [3, 5, 7]
+# correct = 23
+
+# residues = [1, 2, 3, 4]
+# moduli = [1000003, 1000033, 1000037, 1000039]
+# correct = None
+
+# TEST
+# x = chinese_remainder.garner(residues, moduli)
+# print(x)
+# assert x == chinese_remainder.tree_crt(residues, moduli)
+# assert all(x % n_i == a_i for a_i, n_i in zip(residues, moduli))
+
+# many residue vectors with the same moduli
+# context = chinese_remainder.CRTContext(moduli)
+# print(context.solve_many([residues, [0] * len(moduli)]))
+
+
 # ===================================================
 #                   FACTORING
 # ====================================================
@@ -171,6 +324,20 @@ import rsa
 # assert n % d == 0
 
 
+# PARALLEL POLLARD RHO
+# --------------------
+
+# n = 10000000019 * 10000000033
+
+# n = 4567890123
+
+# TEST
+# if __name__ == "__main__":
+#     d, iterations = factorization.parallel_rho(n, workers=4)
+#     print(d, iterations)
+#     assert n % d == 0
+
+
 # POLLARD P-1
 # -----------
 
@@ -194,6 +361,26 @@ import rsa
 # assert d_1 * d_2 == n
 
 
+# WILLIAMS P+1
+# ------------
+
+# 1208435215651 + 1 is smooth
+# n = 1208435215651 * 326996921656679
+# bound = 100
+# stage_2_bound = None
+
+# 7515199886083 + 1 = 5003 * (smooth part)
+# n = 7515199886083 * 326996921656679
+# bound = 100
+# stage_2_bound = 6000
+
+# TEST
+# d_1, d_2 = factorization.williams_p_plus_1_method(n, bound, stage_2_bound)
+# print(d_1, d_2)
+
+# assert d_1 * d_2 == n
+
+
 # SQUFOF
 # ------
 
@@ -215,6 +402,25 @@ import rsa
 # assert n % divisor == 0
 
 
+# FACTORING JOBS
+# --------------
+
+# n = 1000000000039 * 1000000000061
+# method = "squfof"
+
+# n = 4549 * 7883 * 2 * 7417 * 5281 * 1000003
+# method = "pollard_p_minus_1"
+
+# TEST
+# result, checkpoint = factoring_jobs.run_with_deadline(n, method, time_budget=0.5)
+# print(result)
+
+# resumed with larger bounds if the job did not finish
+# job = factoring_jobs.FactoringJob.resume(checkpoint, smoothness_bound=10**6)
+# factors, cofactor = job.run(time_budget=5)
+# assert math.prod(factors) * cofactor == n
+
+
 # ===================================================
 #                 PRIMALITY TESTING
 # ===================================================
@@ -420,10 +626,129 @@ import rsa
 # assert result == correct
 
 
+# PRIMITIVE ROOTS AND MULTIPLICATIVE ORDERS
+# -----------------------------------------
+
+# n = 50021
+
+# n = 1234577
+
+# n = 2 * 3**7
+
+# TEST
+# g = multiplicative_group.find_primitive_root(n)
+# print(g)
+# assert multiplicative_group.is_primitive_root(g, n)
+# assert multiplicative_group.multiplicative_order(g, n) == multiplicative_group.group_order(n)[0]
+# print(multiplicative_group.multiplicative_orders([5, 7, 11, 13], n))
+
+
 # ===================================================
 #                       RSA
 # ===================================================
 
+# PRIME SEARCH
+# ------------
+
+# number of candidates scanned and strong tests run for one 1024-bit prime
+# search = rsa.search_prime(2**1023, 2**1024 - 1)
+# print(search.candidates, search.tests)
+# assert primality_testing.miller_rabin_test(search.prime, 20)[0]
+
+# SAFE AND STRONG PRIMES
+# ----------------------
+
+# safe prime p = 2q + 1 sets up a group for discrete_log, the subgroup of squares has the prime order q
+# (Silver-Pohlig-Hellman gains nothing there, so the DLP is only solvable for small p)
+# p = rsa.generate_safe_prime(40)
+# assert primality_testing.miller_rabin_test((p - 1) // 2, 20)[0]
+# group = discrete_log.DlogGroup(4, p)
+# assert group.solve(pow(4, 12345, p)) == 12345
+
+# (from 1024 bits the search runs in worker processes)
+# if __name__ == "__main__":
+#     strong = rsa.generate_strong_prime(1024)
+#     assert primality_testing.miller_rabin_test(strong, 20)[0]
+
+# KEY POOL
+# --------
+
+# ready key pairs are kept in the pool and refilled by worker processes in the background
+# (the spool keeps the ready keys over restarts)
+# if __name__ == "__main__":
+#     with key_pool.KeyPool(sizes=(1024, 2048), depth=4, spool="keys.spool", spool_key=b"secret") as pool:
+#         public_key, secret_key = pool.get(2048)
+#         print(pool.try_get(1024))
+#         print(pool.metrics())
+
+# SIGNATURES OF FILES
+# -------------------
+
+# (the file is hashed by SHA-256 in chunks, it is never loaded into memory at once)
+# public_key, secret_key = rsa.generate_key_pair(2**255, 2**256)
+# signature = rsa.sign_file("payload.bin", public_key, secret_key)
+# assert rsa.valid_file_signature("payload.bin", signature, public_key)
+
+# KEY OBJECTS
+# -----------
+
+# RSAPublicKey can be used in place of the tuple (n, e), RSAPrivateKey computes its CRT parameters once
+# public_key, secret_key = rsa.generate_keys(*rsa.prime_bounds(1024))
+# signature = rsa.sign_message("hello", public_key, secret_key)
+# assert rsa.valid_signature("hello", signature, public_key)
+# cache = {public_key: "Alice"}
+
+# KEY STORE
+# ---------
+
+# keys and certificates in one binary file, loaded by their ids from the memory mapped index
+# public_key, secret_key = rsa.generate_keys(*rsa.prime_bounds(1024))
+# with key_store.KeyStore("keys.store") as store:
+#     store.put("alice.pub", public_key)
+#     store.put("alice.key", secret_key)
+#     store.put("prime", primality_testing.pocklington_certificate(2**127 - 1))
+#
+# with key_store.KeyStore("keys.store") as store:
+#     assert store.get("alice.key") == secret_key
+#     assert primality_testing.valid_certificate(store.get("prime"))
+
+# MULTI-PRIME KEYS
+# ----------------
+
+# 2048-bit modulus with 3 primes (the secret key operations are about 2 times faster than with 2 primes)
+# public_key, secret_key = rsa.generate_key_pair(*rsa.prime_bounds(2048, 3), count=3)
+# assert rsa.decrypt(rsa.encrypt(123, public_key, public_key, secret_key), public_key, public_key, secret_key) == 123
+
+# BATCH RSA
+# ---------
+
+# one modulus with the public exponents 3, 5, ..., 23, the ciphers are encrypted with different exponents
+# public_key, secret_key = batch_rsa.generate_key_pair(*rsa.prime_bounds(1024))
+# messages = [11, 22, 33, 44]
+# ciphers = [(batch_rsa.encrypt(m, public_key, e), e) for m, e in zip(messages, (3, 5, 7, 11))]
+# assert batch_rsa.batch_decrypt(ciphers, public_key, secret_key) == messages
+
+# BATCH VERIFICATION OF SIGNATURES
+# --------------------------------
+
+# public_key, secret_key = rsa.generate_key_pair(2**511, 2**512)
+# messages = [f"message {i}" for i in range(100)]
+# signatures = [rsa.sign_message(message, public_key, secret_key) for message in messages]
+# assert all(rsa.verify_batch(messages, signatures, public_key))
+
+# STREAMING ENCRYPTION OF FILES
+# -----------------------------
+
+# (the modulus must have at least 536 bits for the padding)
+# if __name__ == "__main__":
+#     public_key, secret_key = rsa.generate_key_pair(2**511, 2**512)
+#
+#     with open("payload.bin", "rb") as source, open("payload.rsa", "wb") as target:
+#         rsa_stream.encrypt_stream(source, target, public_key, workers=4)
+#
+#     with open("payload.rsa", "rb") as source, open("payload.out", "wb") as target:
+#         rsa_stream.decrypt_stream(source, target, public_key, secret_key, workers=4)
+
 # the protocol may fail sometimes because probabilistic primes
 # generation is used in the key generation
 
@@ -478,8 +803,9 @@ m_2_encrypted = rsa.encrypt(m_2, public_key_ALICE, public_key_BOB, secret_key_BO
 print(f"Bob writes m_2 = {m_2}. Encrypts it into (c_2, s_2) = {m_2_encrypted}.\n")
 
 # Alice receives m_2
+# (check=True verifies the CRT computation of the secret key operation)
 m_2_decrypted = rsa.decrypt(
-    m_2_encrypted, public_key_BOB, public_key_ALICE, secret_key_ALICE
+    m_2_encrypted, public_key_BOB, public_key_ALICE, secret_key_ALICE, check=True
 )
 
 print(
@@ -0,0 +1,434 @@
+import functools
+import json
+import math
+import time
+
+import factorization
+import primality_testing
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Factoring jobs run the algorithms from factorization.py in time slices, that is:
+#
+# For given n, a method and a time budget, run the method until the budget is spent
+# and return the prime factors found so far together with the remaining cofactor.
+#
+# The whole state of a job (including the internal state of the method) can be saved to a checkpoint,
+# from which the job can be resumed later (possibly with larger bounds), without losing the work done.
+
+# Each method is represented by two functions:
+#   start_<method>(n, bounds) returns the initial state of the method for n,
+#   step_<method>(n, state, bounds, steps) does at most given number of steps and returns
+#   a nontrivial factor of n (or None, if no factor was found yet).
+# The states only contain integers, lists and strings, so they can be saved as JSON.
+# The key "status" of a state is "running", "bound" (the bounds were reached) or "failed".
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Prime Numbers and Computer Methods for Factorization. (2011) ISBN 0-8493-8523-7.
+# [2] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [3] Square Form Factorization. (https://homes.cerias.purdue.edu/~ssw/squfof.pdf)
+
+
+class FactoringJob:
+    """
+    Factoring of n by one of the methods, which can be run under a time budget, saved and resumed.
+
+    Attributes:
+        n (int): Number being factored.
+        method (str): Name of the method ("trial_division", "pollard_rho", "pollard_p_minus_1" or "squfof").
+        bounds (dict): Bounds of the method. (See METHODS for their names and default values.)
+        factors (list): Prime factors found so far.
+        composites (list): Composite factors of n that are still to be split. (The last one is being worked on.)
+        state (dict): Internal state of the method for the last composite. None if the method was not started yet.
+    """
+
+    def __init__(self, n, method="pollard_rho", **bounds):
+        if method not in METHODS:
+            raise ValueError(f"Unknown factoring method {method}.")
+
+        _, _, default_bounds = METHODS[method]
+
+        self.n = n
+        self.method = method
+        self.bounds = {**default_bounds, **bounds}
+        self.factors = []
+        self.composites = []
+        self.state = None
+
+        self.add_factor(n)
+
+    def run(self, time_budget, slice_steps=1000):
+        """
+        Runs the job until it is finished, the method gives up, or the time budget is spent.
+
+        Args:
+            time_budget (float): Number of seconds the job may run.
+            slice_steps (int, optional): Number of steps of the method between checks of the time. Defaults to 1000.
+
+        Returns:
+            PartialFactorization: Prime factors found so far and the remaining cofactor.
+        """
+        start, step, _ = METHODS[self.method]
+        deadline = time.monotonic() + time_budget
+
+        while self.composites and time.monotonic() < deadline:
+            current = self.composites[-1]
+
+            if self.state is None:
+                self.state = start(current, self.bounds)
+
+            if self.state["status"] != "running":
+                break
+
+            divisor = step(current, self.state, self.bounds, slice_steps)
+
+            if divisor is not None:
+                self.composites.pop()
+                self.state = None
+
+                self.add_factor(divisor)
+                self.add_factor(current // divisor)
+
+        return self.result()
+
+    def add_factor(self, factor):
+        """Stores the factor either as a prime factor, or as a composite to be split later."""
+        if factor == 1:
+            return
+
+        if primality_testing.miller_rabin_test(factor, 20)[0]:
+            self.factors.append(factor)
+        else:
+            self.composites.append(factor)
+
+    def result(self):
+        """Returns the prime factors found so far and the remaining cofactor."""
+        return factorization.PartialFactorization(
+            sorted(self.factors), math.prod(self.composites)
+        )
+
+    def finished(self):
+        """Tests whether n was factored completely."""
+        return not self.composites
+
+    def status(self):
+        """Returns the status of the method ("finished", "running", "bound" or "failed")."""
+        if self.finished():
+            return "finished"
+
+        if self.state is None:
+            return "running"
+
+        return self.state["status"]
+
+    def checkpoint(self):
+        """Returns the whole state of the job as a JSON string."""
+        return json.dumps(
+            {
+                "n": self.n,
+                "method": self.method,
+                "bounds": self.bounds,
+                "factors": self.factors,
+                "composites": self.composites,
+                "state": self.state,
+            }
+        )
+
+    @classmethod
+    def resume(cls, checkpoint, **bounds):
+        """
+        Restores a job from its checkpoint.
+
+        Args:
+            checkpoint (str): Checkpoint returned by FactoringJob.checkpoint.
+            **bounds: New (larger) bounds of the method. A method that stopped on its bounds continues with them.
+
+        Returns:
+            FactoringJob: The restored job.
+        """
+        saved = json.loads(checkpoint)
+
+        job = cls.__new__(cls)
+        job.n = saved["n"]
+        job.method = saved["method"]
+        job.bounds = {**saved["bounds"], **bounds}
+        job.factors = saved["factors"]
+        job.composites = saved["composites"]
+        job.state = saved["state"]
+
+        if bounds and job.state is not None and job.state["status"] == "bound":
+            job.state["status"] = "running"
+
+        return job
+
+
+def run_with_deadline(n, method, time_budget, **bounds):
+    """
+    Runs a new factoring job of n under the given time budget.
+
+    Args:
+        n (int): Number to factor.
+        method (str): Name of the method. (See METHODS.)
+        time_budget (float): Number of seconds the job may run.
+        **bounds: Bounds of the method.
+
+    Returns:
+        tuple: PartialFactorization of n and a checkpoint from which the job can be resumed.
+    """
+    job = FactoringJob(n, method, **bounds)
+    result = job.run(time_budget)
+
+    return result, job.checkpoint()
+
+
+# [1]
+def start_trial_division(n, bounds):
+    """Returns the initial state of the trial division."""
+    return {"status": "running", "divisor": 2}
+
+
+def step_trial_division(n, state, bounds, steps):
+    """Tries at most given number of trial divisors. (Divisors up to bounds["bound"] are used.)"""
+    bound = bounds["bound"]
+    divisor = state["divisor"]
+
+    for _ in range(steps):
+        if bound is not None and divisor > bound:
+            state["status"] = "bound"
+            break
+
+        if factorization.is_divisible(n, divisor):
+            return divisor
+
+        # 2, 3, 5, 7, 11, 13, ... (numbers of form 6k +- 1)
+        if divisor < 5:
+            divisor = divisor + 1 if divisor == 2 else 5
+        elif divisor % 6 == 5:
+            divisor += 2
+        else:
+            divisor += 4
+
+        state["divisor"] = divisor
+
+    return None
+
+
+# [2]
+def start_pollard_rho(n, bounds):
+    """Returns the initial state of the Pollard rho method."""
+    return {"status": "running", "tortoise": 2, "hare": 2, "constant": 1, "iteration": 0}
+
+
+def step_pollard_rho(n, state, bounds, steps):
+    """Does at most given number of iterations of Floyd's algorithm with the function x^2 + c. (At most bounds["iteration_bound"] in total.)"""
+    tortoise, hare, constant = state["tortoise"], state["hare"], state["constant"]
+    factor = None
+
+    for _ in range(steps):
+        if factorization.broken_upper_bound(bounds["iteration_bound"], state["iteration"]):
+            state["status"] = "bound"
+            break
+
+        tortoise = (tortoise * tortoise + constant) % n
+        hare = (hare * hare + constant) % n
+        hare = (hare * hare + constant) % n
+        state["iteration"] += 1
+
+        d = math.gcd(tortoise - hare, n)
+
+        if d == n:
+            # the walk cycled, try a different function
+            tortoise, hare, constant = 2, 2, constant + 1
+        elif d != 1:
+            factor = d
+            break
+
+    state["tortoise"], state["hare"], state["constant"] = tortoise, hare, constant
+
+    return factor
+
+
+# [2]
+def start_pollard_p_minus_1(n, bounds):
+    """Returns the initial state of the Pollard p-1 method."""
+    return {"status": "running", "base": 2, "power": 2, "index": 0}
+
+
+def step_pollard_p_minus_1(n, state, bounds, steps):
+    """Raises the power to at most given number of prime powers. (Primes up to bounds["smoothness_bound"] are used.)"""
+    d = math.gcd(state["base"], n)
+    if 1 < d < n:
+        return d
+
+    small_primes = stage_1_primes(bounds["smoothness_bound"])
+    index = state["index"]
+    power = state["power"]
+
+    for prime in small_primes[index : index + steps]:
+        power = pow(power, factorization.largest_prime_power(prime, n), n)
+
+    d = math.gcd(power - 1, n)
+
+    if d == n:
+        # all the factors were found at once, repeat the slice prime by prime
+        power = state["power"]
+        d = 1
+
+        for prime in small_primes[index : index + steps]:
+            prime_power = factorization.largest_prime_power(prime, n)
+
+            while prime_power > 1 and d == 1:
+                power = pow(power, prime, n)
+                prime_power //= prime
+                d = math.gcd(power - 1, n)
+
+            if d != 1:
+                break
+
+    state["index"] = min(index + steps, len(small_primes))
+    state["power"] = power
+
+    if 1 < d < n:
+        return d
+
+    if d == n:
+        # even a single prime finds all the factors at once, start again with a different base
+        state["base"] += 1
+        state["power"] = state["base"]
+        state["index"] = 0
+
+        if state["base"] > 10:
+            state["status"] = "failed"
+
+    elif state["index"] == len(small_primes):
+        state["status"] = "bound"
+
+    return None
+
+
+@functools.lru_cache(maxsize=8)
+def stage_1_primes(smoothness_bound):
+    """Returns the primes used by the first stage of the p-1 method. (Cached, so that the slices do not sieve again.)"""
+    stage_1, _ = factorization.stage_primes(smoothness_bound)
+    return stage_1
+
+
+# [3]
+def start_squfof(n, bounds):
+    """Returns the initial state of SQUFOF."""
+    d = 2 * n if n % 4 == 1 else n
+
+    first_partial_quotient = math.isqrt(d)
+    small_bound = 2 * math.isqrt(2 * math.isqrt(d))
+
+    return {
+        "status": "running",
+        "phase": 1,
+        "d": d,
+        "first_partial_quotient": first_partial_quotient,
+        "p_1": first_partial_quotient,
+        "large_Q": d - first_partial_quotient * first_partial_quotient,
+        "q_with_caret": 1,
+        "small_bound": small_bound,
+        "large_bound": 2 * small_bound,
+        "iteration": 0,
+        "queue": [],
+    }
+
+
+def step_squfof(n, state, bounds, steps):
+    """Does at most given number of iterations of SQUFOF. (At most bounds["iteration_bound"] in each of the phases.)"""
+    trivial_divisor = factorization.trivial_divisibility_check(n)
+    if trivial_divisor is not None:
+        return trivial_divisor
+
+    iteration_bound = bounds["iteration_bound"]
+    if iteration_bound is None:
+        iteration_bound = state["large_bound"]
+
+    d = state["d"]
+    first_partial_quotient = state["first_partial_quotient"]
+    small_bound = state["small_bound"]
+    p_1, large_Q, q_with_caret = state["p_1"], state["large_Q"], state["q_with_caret"]
+    queue = state["queue"]
+    factor = None
+
+    for _ in range(steps):
+        if factorization.broken_upper_bound(iteration_bound, state["iteration"]):
+            state["status"] = "bound"
+            break
+
+        partial_quotient = (first_partial_quotient + p_1) // large_Q
+        p_2 = partial_quotient * large_Q - p_1
+
+        # 2. forward cycling until a proper square form is found
+        if state["phase"] == 1:
+            if large_Q <= small_bound and factorization.is_even(large_Q):
+                queue.append([large_Q // 2, p_1 % (large_Q // 2)])
+            elif 2 * large_Q <= small_bound:
+                queue.append([large_Q, p_1 % large_Q])
+
+            t = q_with_caret + partial_quotient * (p_1 - p_2)
+            q_with_caret, large_Q, p_1 = large_Q, t, p_2
+
+            if factorization.is_even(state["iteration"]) and factorization.is_square(
+                large_Q
+            ):
+                r = math.isqrt(large_Q)
+
+                for index, (x, y) in enumerate(queue):
+                    if r == x and factorization.is_divisible(p_1 - y, r):
+                        if r == 1:
+                            state["status"] = "failed"
+                        del queue[: index + 1]
+                        break
+                else:
+                    # 3. the square root of the form
+                    q_with_caret = r
+                    p_1 = p_1 + r * ((first_partial_quotient - p_1) // r)
+                    large_Q = (d - p_1 * p_1) // q_with_caret
+
+                    state["phase"] = 2
+                    state["iteration"] = -1
+
+                if state["status"] == "failed":
+                    break
+
+        # 4. reverse cycling until the symmetry point is found
+        else:
+            if p_1 == p_2:
+                candidate = large_Q // 2 if factorization.is_even(large_Q) else large_Q
+                factor = math.gcd(candidate, n)
+
+                if not 1 < factor < n:
+                    factor = None
+                    state["status"] = "failed"
+                break
+
+            t = q_with_caret + partial_quotient * (p_1 - p_2)
+            q_with_caret, large_Q, p_1 = large_Q, t, p_2
+
+        state["iteration"] += 1
+
+    state["p_1"], state["large_Q"], state["q_with_caret"] = p_1, large_Q, q_with_caret
+
+    return factor
+
+
+# each method with its start function, step function and default bounds
+METHODS = {
+    "trial_division": (start_trial_division, step_trial_division, {"bound": None}),
+    "pollard_rho": (start_pollard_rho, step_pollard_rho, {"iteration_bound": 10**6}),
+    "pollard_p_minus_1": (
+        start_pollard_p_minus_1,
+        step_pollard_p_minus_1,
+        {"smoothness_bound": 10**5},
+    ),
+    "squfof": (start_squfof, step_squfof, {"iteration_bound": None}),
+}
@@ -1,6 +1,10 @@
+import bisect
 import math
+import multiprocessing
+import os
 import random
-from collections import deque
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 # Use of prime numbers in data encryption
@@ -29,6 +33,8 @@ from collections import deque
 # [2] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
 # [3] Development of sieve of Eratosthenes and sieve of Sundaram's proof. (https://doi.org/10.48550/arXiv.2102.06653)
 # [4] Square Form Factorization. (https://homes.cerias.purdue.edu/~ssw/squfof.pdf)
+# [5] Prime Numbers: A Computational Perspective. (2005) ISBN 978-0-387-25282-7.
+# [6] How to Find Smooth Parts of Integers. (2004) (https://cr.yp.to/factorization/smoothparts-20040510.pdf)
 
 
 def naive_trial_division(n):
@@ -79,44 +85,76 @@ def trial_division(n, given_upper_bound=math.inf):
     Returns:
         list: List of prime factors that divide the number n that are smaller than given_upper_bound.
     """
+    prime_factors, current = exhaust(iter_factors(n, bound=given_upper_bound))
 
-    prime_factors = []
-    current = n
-    upper_bound = min(given_upper_bound, math.isqrt(n))
+    if current != 1:
+        print(
+            f"Factorization was NOT COMPLETED because of the given upper bound.\nFound prime factors are {prime_factors,}. The remaining cofactor is {current}.\n"
+        )
 
-    def reduce(number):
-        nonlocal current
-        nonlocal upper_bound
+    return prime_factors
 
-        if number > 1:
-            while is_divisible(current, number):
-                prime_factors.append(number)
-                current //= number
 
-        upper_bound = min(upper_bound, math.isqrt(current))
+# result of a factorization that may not be complete (cofactor is 1 for a complete one)
+PartialFactorization = namedtuple("PartialFactorization", ["factors", "cofactor"])
 
-    reduce(2)
-    reduce(3)
-    number = 5
 
-    while number <= upper_bound:
-        if is_divisible(current, number):
-            reduce(number)
+# [1]
+def iter_factors(n, bound=math.inf):
+    """
+    Yields the prime factors of n in increasing order, as they are found by trial division.
+    The generator can be stopped at any point, the work for the larger factors is then not done at all.
 
-        if is_divisible(current, number + 2):
-            reduce(number + 2)
+    Args:
+        n (int): Number to factor.
+        bound (int, optional): If this bound is given, only trial divisors up to this bound are used. Defaults to math.inf.
 
-        number += 6
+    Yields:
+        int: Prime factors of n. (If p^2 divides n, p is yielded twice.)
 
-    if number > math.isqrt(current):
-        reduce(current)
+    Returns:
+        PartialFactorization: Returned by the exhausted generator. All the found prime factors and the remaining cofactor.
+    """
+    prime_factors = []
+    current = n
 
-    if current != 1:
-        print(
-            f"Factorization was NOT COMPLETED because of the given upper bound.\nFound prime factors are {prime_factors,}. The remaining cofactor is {current}.\n"
-        )
+    def divisor_candidates():
+        yield 2
+        yield 3
+
+        number = 5
+        while True:
+            yield number
+            yield number + 2
+            number += 6
+
+    for number in divisor_candidates():
+        # the remaining cofactor has no smaller factor, thus it is prime
+        if number > math.isqrt(current):
+            if current > 1:
+                prime_factors.append(current)
+                yield current
+                current = 1
+            break
 
-    return prime_factors
+        if number > bound:
+            break
+
+        while is_divisible(current, number):
+            prime_factors.append(number)
+            yield number
+            current //= number
+
+    return PartialFactorization(prime_factors, current)
+
+
+def exhaust(factor_stream):
+    """Runs the factor stream (see iter_factors) to its end and returns its PartialFactorization."""
+    while True:
+        try:
+            next(factor_stream)
+        except StopIteration as stop:
+            return stop.value
 
 
 # [2]
@@ -146,13 +184,112 @@ def pollard_rho_method(n, f=lambda x, p: (x**2 + 1) % p):
 
 
 # [2]
-def pollard_p_minus_1_method(n, smoothness_bound=10**5):
+def parallel_rho(n, workers=None, constants=None, iteration_bound=None):
+    """
+    Searches for a nontrivial factor of n by running several Pollard rho walks at once.
+    Each walk uses the function x^2 + c for a different constant c, the first nontrivial factor stops all the walks.
+
+    Args:
+        n (int): Number for which we try to find the nontrivial factor.
+        workers (int, optional): Number of processes running the walks. Defaults to None (the number of CPUs).
+        constants (list, optional): Constants c of the walks. Defaults to None (1, 2, ..., workers).
+        iteration_bound (int, optional): Maximal number of iterations of a single walk. Defaults to None (no bound).
+
+    Returns:
+        tuple: A factor of n (may be trivial) and a list with the number of iterations of each walk.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if constants is None:
+        constants = list(range(1, workers + 1))
+
+    stop_event = multiprocessing.Event()
+    iterations = [0] * len(constants)
+    d = n
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=set_stop_event, initargs=(stop_event,)
+    ) as executor:
+        futures = {
+            executor.submit(rho_walk, n, constant, iteration_bound): index
+            for index, constant in enumerate(constants)
+        }
+
+        for future in as_completed(futures):
+            # walks that did not start before the factor was found
+            if future.cancelled():
+                continue
+
+            factor, iterations[futures[future]] = future.result()
+
+            if 1 < factor < n and not 1 < d < n:
+                d = factor
+
+                stop_event.set()
+                for other in futures:
+                    other.cancel()
+
+    if d == n:
+        print("Nontrivial factor was NOT FOUND. Try different constants.")
+
+    return d, iterations
+
+
+# the event that tells the walks running in a worker process to stop
+stop_walks = None
+
+
+def set_stop_event(event):
+    """Shares the stop event with the walks in a worker process."""
+    global stop_walks
+    stop_walks = event
+
+
+def rho_walk(n, constant, iteration_bound=None, check_every=1000):
+    """
+    Runs a single walk of the Pollard rho method with the function x^2 + constant. (Used by parallel_rho.)
+
+    Args:
+        n (int): Number for which we try to find the nontrivial factor.
+        constant (int): Constant c of the function x^2 + c.
+        iteration_bound (int, optional): Maximal number of iterations. Defaults to None (no bound).
+        check_every (int, optional): Number of iterations between checks of the stop event. Defaults to 1000.
+
+    Returns:
+        tuple: A factor of n (n if the walk cycled, 1 if it was stopped) and the number of iterations done.
+    """
+    tortoise, hare = 2, 2
+    d = 1
+    iteration = 0
+
+    while d == 1:
+        tortoise = (tortoise * tortoise + constant) % n
+        hare = (hare * hare + constant) % n
+        hare = (hare * hare + constant) % n
+        d = math.gcd(tortoise - hare, n)
+        iteration += 1
+
+        if iteration == iteration_bound:
+            break
+
+        # another walk has already found a factor
+        if iteration % check_every == 0 and stop_walks is not None:
+            if stop_walks.is_set():
+                break
+
+    return d, iteration
+
+
+# [2]
+def pollard_p_minus_1_method(n, smoothness_bound=10**5, stage_2_bound=None):
     """
     Searches for a nontrivial factor of n.
 
     Args:
         n (int): Number for which we try to find the nontrivial factor.
         smoothness_bound: All the prime factors of n are less or equal to smoothness_bound. Defaults to 10**5.
+        stage_2_bound (int, optional): Allows one prime factor of p - 1 between smoothness_bound and stage_2_bound. Defaults to None (no second stage).
 
     Returns:
         tuple: Two factors of n. (May be trivial.)
@@ -164,20 +301,179 @@ def pollard_p_minus_1_method(n, smoothness_bound=10**5):
         return d, n // d
 
     # for each prime <= B
-    small_primes = find_small_primes(smoothness_bound + 1)
+    stage_1_primes, stage_2_primes = stage_primes(smoothness_bound, stage_2_bound)
 
-    for prime in small_primes:
-        l = math.floor(math.log(n) / math.log(prime))
-        a = pow(a, (prime**l), n)
+    for prime in stage_1_primes:
+        a = pow(a, largest_prime_power(prime, n), n)
 
     d = math.gcd(a - 1, n)
 
+    if d == 1 and stage_2_primes:
+        d = p_minus_1_stage_2(a, n, stage_2_primes)
+
     if d == n or d == 1:
         print("Nontrivial factor was NOT FOUND. Try a bigger smoothness bound.")
 
     return d, n // d
 
 
+# [5]
+def p_minus_1_stage_2(b, n, stage_2_primes):
+    """
+    Continues the p - 1 method, looking for a single prime q from stage_2_primes for which b^q = 1 (mod p).
+
+    Args:
+        b (int): Result of the first stage of the p - 1 method.
+        n (int): Number for which we try to find the nontrivial factor.
+        stage_2_primes (list): Primes between the two bounds in increasing order.
+
+    Returns:
+        int: A factor of n. (May be trivial.)
+    """
+    # powers of b for the (even) gaps between consecutive primes
+    gap_powers = {}
+
+    current = pow(b, stage_2_primes[0], n)
+    accumulated = current - 1
+
+    for previous, prime in zip(stage_2_primes, stage_2_primes[1:]):
+        gap = prime - previous
+
+        if gap not in gap_powers:
+            gap_powers[gap] = pow(b, gap, n)
+
+        current = current * gap_powers[gap] % n
+        accumulated = accumulated * (current - 1) % n
+
+    return math.gcd(accumulated, n)
+
+
+# [1]
+def williams_p_plus_1_method(
+    n, smoothness_bound=10**5, stage_2_bound=None, seeds=(3, 5, 7, 9, 11)
+):
+    """
+    Searches for a nontrivial factor of n. (Finds the prime factors p for which p + 1 is smooth.)
+
+    Args:
+        n (int): Number for which we try to find the nontrivial factor.
+        smoothness_bound (int, optional): All the prime factors of p + 1 are less or equal to smoothness_bound. Defaults to 10**5.
+        stage_2_bound (int, optional): Allows one prime factor of p + 1 between smoothness_bound and stage_2_bound. Defaults to None (no second stage).
+        seeds (tuple, optional): Starting values of the Lucas sequence, each of them is tried until a factor is found. Defaults to (3, 5, 7, 9, 11).
+
+    Returns:
+        tuple: Two factors of n. (May be trivial.)
+    """
+    stage_1_primes, stage_2_primes = stage_primes(smoothness_bound, stage_2_bound)
+
+    d = 1
+    for seed in seeds:
+        d = math.gcd(seed * seed - 4, n)
+
+        if 1 < d < n:
+            return d, n // d
+
+        # V_M(seed), where M is the product of all prime powers <= B
+        v = seed
+        for prime in stage_1_primes:
+            v = lucas_v(v, largest_prime_power(prime, n), n)
+
+        d = math.gcd(v - 2, n)
+
+        if d == 1 and stage_2_primes:
+            d = p_plus_1_stage_2(v, n, stage_2_primes)
+
+        # only p - 1 was found to be smooth for this seed, or all the factors at once
+        if 1 < d < n:
+            return d, n // d
+
+    print("Nontrivial factor was NOT FOUND. Try bigger bounds or different seeds.")
+
+    return d, n // d
+
+
+# [5]
+def p_plus_1_stage_2(v, n, stage_2_primes, step=210):
+    """
+    Continues the p + 1 method, looking for a single prime q from stage_2_primes for which V_q(v) = 2 (mod p).
+
+    Args:
+        v (int): Result of the first stage of the p + 1 method.
+        n (int): Number for which we try to find the nontrivial factor.
+        stage_2_primes (list): Primes between the two bounds in increasing order.
+        step (int, optional): Even distance between the giant steps. Defaults to 210.
+
+    Returns:
+        int: A factor of n. (May be trivial.)
+    """
+    # every prime q is written as q = k * step +- j, and V_(k * step) = V_j (mod p) when p | V_q - 2
+    half_step = step // 2
+
+    # V_j for 0 <= j <= step / 2
+    small_values = [2, v]
+    for _ in range(half_step - 1):
+        small_values.append((small_values[-1] * v - small_values[-2]) % n)
+
+    v_step = (small_values[half_step] ** 2 - 2) % n
+    k, v_k, v_previous = 0, 2, v_step
+
+    accumulated = 1
+
+    for prime in stage_2_primes:
+        target = (prime + half_step) // step
+
+        # V_((k + 1) * step) = V_(k * step) * V_step - V_((k - 1) * step)
+        while k < target:
+            v_k, v_previous = (v_k * v_step - v_previous) % n, v_k
+            k += 1
+
+        j = abs(prime - k * step)
+        accumulated = accumulated * (v_k - small_values[j]) % n
+
+    return math.gcd(accumulated, n)
+
+
+# [1], [5]
+def lucas_v(v, exponent, n):
+    """
+    Computes the Lucas sequence member V_exponent(v) mod n using a binary ladder.
+
+    Args:
+        v (int): Parameter of the Lucas sequence (V_0 = 2, V_1 = v, V_(k+1) = v * V_k - V_(k-1)).
+        exponent (int): Index of the wanted member of the sequence.
+        n (int): Modulus.
+
+    Returns:
+        int: V_exponent(v) mod n.
+    """
+    # pair (V_k, V_(k+1)), starting with k = 0
+    low, high = 2, v % n
+
+    for bit in bin(exponent)[2:]:
+        if bit == "1":
+            low, high = (low * high - v) % n, (high * high - 2) % n
+        else:
+            low, high = (low * low - 2) % n, (low * high - v) % n
+
+    return low
+
+
+def stage_primes(smoothness_bound, stage_2_bound=None):
+    """Splits the small primes into primes of the first (<= smoothness_bound) and the second stage (<= stage_2_bound)."""
+    if stage_2_bound is None or stage_2_bound <= smoothness_bound:
+        return find_small_primes(smoothness_bound + 1), []
+
+    small_primes = find_small_primes(stage_2_bound + 1)
+    split = bisect.bisect_right(small_primes, smoothness_bound)
+
+    return small_primes[:split], small_primes[split:]
+
+
+def largest_prime_power(prime, n):
+    """Returns the largest power of prime that is not greater than n."""
+    return prime ** math.floor(math.log(n) / math.log(prime))
+
+
 # [3]
 def find_small_primes(smoothness_bound):
     """
@@ -210,6 +506,61 @@ def find_small_primes(smoothness_bound):
     return small_primes
 
 
+# [6]
+def batch_smoothness_test(candidates, small_primes):
+    """
+    Decides for all the candidates at once, whether they factor completely over the given small primes.
+
+    Args:
+        candidates (list): Positive integers being tested.
+        small_primes (list): The primes over which the candidates should factor.
+
+    Returns:
+        list: List of booleans, True for the candidates that are smooth.
+    """
+    if not candidates:
+        return []
+
+    # P mod v for every candidate v, where P is the product of all the small primes
+    remainders = remainder_tree(math.prod(small_primes), product_tree(candidates))
+
+    decisions = []
+
+    for candidate, remainder in zip(candidates, remainders):
+        # P^(2^e) is divisible by every smooth v when 2^e >= log2(v)
+        for _ in range(max(1, candidate.bit_length() - 1).bit_length()):
+            remainder = remainder * remainder % candidate
+
+        decisions.append(remainder == 0)
+
+    return decisions
+
+
+# [5], [6]
+def product_tree(values):
+    """Returns the levels of the product tree of values, from the values themselves up to the root (their product)."""
+    levels = [list(values)]
+
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append(
+            [math.prod(level[i : i + 2]) for i in range(0, len(level), 2)]
+        )
+
+    return levels
+
+
+# [5], [6]
+def remainder_tree(value, tree):
+    """Returns the remainders of value modulo all the leaves of the product tree."""
+    remainders = [value % tree[-1][0]]
+
+    for level in reversed(tree[:-1]):
+        remainders = [remainders[i // 2] % node for i, node in enumerate(level)]
+
+    return remainders
+
+
 # [4]
 def squfof(n):
     """
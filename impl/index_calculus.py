@@ -0,0 +1,405 @@
+import json
+import math
+import random
+from collections import Counter, defaultdict
+
+import chinese_remainder
+import discrete_log
+import factorization
+import multiplicative_group
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# The index calculus method solves the discrete logarithm problem (DLP) in the multiplicative group Z*p, that is:
+#
+# For given generator, result and prime modulus p, find the least integer e, that:
+#
+#   generator^e = result (mod p)
+#
+# Unlike the algorithms in discrete_log.py, it is not a generic group algorithm. It uses the fact, that many
+# elements of Z*p factor over a small set of primes (factor base). The logarithms of the factor base are computed
+# once (this precomputation can be saved to a file) and then individual logarithms are found quickly.
+#
+# The linear algebra is done modulo the large prime powers of p - 1 only, the small prime powers
+# are handled by the Silver-Pohlig-Hellman algorithm.
+
+# REMARK: It is assumed, that generator is a primitive root modulo p.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [2] Prime Numbers: A Computational Perspective. (2005) ISBN 978-0-387-25282-7.
+# [3] Solving Large Sparse Linear Systems Over Finite Fields. (1991) (https://doi.org/10.1007/3-540-38424-3_8)
+
+
+class IndexCalculus:
+    """
+    Precomputation of the index calculus method for one generator and prime modulus.
+
+    Attributes:
+        generator (int): Represents the base of the DLPs. (Must be a primitive root modulo modulus.)
+        modulus (int): Prime modulus of the DLPs.
+        order (int): Order of the group (modulus - 1).
+        smoothness_bound (int): The largest prime of the factor base.
+        factor_base (list): All the primes up to smoothness_bound.
+        small_prime_bound (int): Prime factors of the order up to this bound are solved by the Silver-Pohlig-Hellman algorithm.
+        small_part (dict): Prime powers {q: e} of the order, that are solved by the Silver-Pohlig-Hellman algorithm.
+        large_part (dict): Prime powers {q: e} of the order, that are solved by the linear algebra.
+        logarithms (dict): Logarithms of the factor base modulo the product of the large prime powers. (Empty before precompute.)
+        crt (CRTContext): Precomputed Chinese remainder theorem for the small prime powers and the product of the large ones.
+    """
+
+    def __init__(
+        self,
+        generator,
+        modulus,
+        smoothness_bound=None,
+        prime_factors=None,
+        small_prime_bound=2**16,
+    ):
+        """
+        Args:
+            generator (int): Represents the base of the DLPs. (Must be a primitive root modulo modulus.)
+            modulus (int): Prime modulus of the DLPs.
+            smoothness_bound (int, optional): The largest prime of the factor base. Defaults to None (chosen by the size of modulus).
+            prime_factors (list, optional): Factorization of the group order (modulus - 1).
+            small_prime_bound (int, optional): Prime factors of the order up to this bound are solved by the Silver-Pohlig-Hellman algorithm. Defaults to 2**16.
+
+        Raises:
+            ValueError: If generator is not a primitive root modulo modulus.
+        """
+        self.generator = generator % modulus
+        self.modulus = modulus
+        self.order = modulus - 1
+
+        if smoothness_bound is None:
+            smoothness_bound = choose_smoothness_bound(modulus)
+
+        self.smoothness_bound = smoothness_bound
+        self.factor_base = factorization.find_small_primes(smoothness_bound + 1)
+
+        if prime_factors is None:
+            prime_factors = multiplicative_group.factor_order(self.order)
+
+        if not multiplicative_group.is_primitive_root(
+            self.generator, modulus, prime_factors
+        ):
+            raise ValueError("Generator must be a primitive root modulo the modulus.")
+
+        factors = Counter(prime_factors)
+
+        self.small_prime_bound = small_prime_bound
+        self.small_part = {q: e for q, e in factors.items() if q <= small_prime_bound}
+        self.large_part = {q: e for q, e in factors.items() if q > small_prime_bound}
+        self.logarithms = {}
+
+        # the large prime powers are joined into a single congruence
+        self.crt = chinese_remainder.CRTContext(
+            [q**e for q, e in self.small_part.items()] + [self.large_modulus()]
+        )
+
+    def large_modulus(self):
+        """Returns the product of the large prime powers of the order."""
+        return math.prod(q**e for q, e in self.large_part.items())
+
+    def precompute(self, extra_relations=20, batch_size=256):
+        """
+        Computes the logarithms of the factor base.
+
+        Args:
+            extra_relations (int, optional): Number of relations collected above the size of the factor base. Defaults to 20.
+            batch_size (int, optional): Number of candidates tested for smoothness at once. Defaults to 256.
+
+        Returns:
+            dict: Logarithms of the factor base modulo the product of the large prime powers.
+        """
+        if not self.large_part:
+            return self.logarithms
+
+        relations = []
+        wanted = len(self.factor_base) + extra_relations
+
+        while True:
+            relations += collect_relations(
+                self.generator,
+                self.modulus,
+                self.factor_base,
+                wanted - len(relations),
+                batch_size,
+            )
+
+            # logarithms of the factor base modulo every large prime power
+            congruences = {}
+
+            for q, e in self.large_part.items():
+                solution = solve_sparse_system(
+                    [exponents for exponents, _ in relations],
+                    [k for _, k in relations],
+                    range(len(self.factor_base)),
+                    q,
+                    e,
+                )
+
+                if solution is None:
+                    break
+
+                congruences[q**e] = solution
+            else:
+                break
+
+            # the relations do not determine all the logarithms yet
+            wanted += extra_relations
+
+        crt = chinese_remainder.CRTContext(list(congruences))
+        logarithms = crt.solve_many(
+            [
+                [solution[index] for solution in congruences.values()]
+                for index in range(len(self.factor_base))
+            ]
+        )
+        self.logarithms = dict(zip(self.factor_base, logarithms))
+
+        return self.logarithms
+
+    def log(self, result, batch_size=64):
+        """
+        Solves the DLP generator^e = result (mod modulus) using the precomputed logarithms.
+
+        Args:
+            result (int): Represents the result of the DLP. (Must be greater than 0.)
+            batch_size (int, optional): Number of candidates tested for smoothness at once. Defaults to 64.
+
+        Raises:
+            ValueError: If result is less or equal to zero, DLP cannot be solved.
+
+        Returns:
+            int: Number e, which satisfies the equation generator^e = result (mod modulus).
+        """
+        if result <= 0:
+            raise ValueError("Result must be greater than zero.")
+
+        if self.large_part and not self.logarithms:
+            self.precompute()
+
+        result %= self.modulus
+        residues = []
+
+        # small prime powers by the Silver-Pohlig-Hellman algorithm
+        for q, e in self.small_part.items():
+            cofactor = self.order // q**e
+            residues.append(
+                discrete_log.recursive_dlog(
+                    pow(self.generator, cofactor, self.modulus),
+                    pow(result, cofactor, self.modulus),
+                    q,
+                    e,
+                    self.modulus,
+                )
+            )
+
+        # large prime powers by the logarithms of the factor base
+        if self.large_part:
+            large_modulus = self.large_modulus()
+
+            while True:
+                # result * generator^s for random values s
+                shifts = [random.randrange(self.order) for _ in range(batch_size)]
+                candidates = [
+                    result * pow(self.generator, s, self.modulus) % self.modulus
+                    for s in shifts
+                ]
+                smooth = factorization.batch_smoothness_test(candidates, self.factor_base)
+
+                if any(smooth):
+                    break
+
+            s, candidate = next(
+                (s, candidate)
+                for s, candidate, is_smooth in zip(shifts, candidates, smooth)
+                if is_smooth
+            )
+
+            logarithm = sum(
+                self.logarithms[prime] for prime in factorization.trial_division(candidate)
+            )
+            residues.append((logarithm - s) % large_modulus)
+        else:
+            residues.append(0)
+
+        return self.crt.solve(residues)
+
+    def save(self, path):
+        """Saves the precomputed logarithms to the file with given path (in JSON format)."""
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "generator": self.generator,
+                    "modulus": self.modulus,
+                    "smoothness_bound": self.smoothness_bound,
+                    "small_prime_bound": self.small_prime_bound,
+                    "small_part": list(self.small_part.items()),
+                    "large_part": list(self.large_part.items()),
+                    "logarithms": list(self.logarithms.items()),
+                },
+                file,
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Loads the precomputed logarithms saved by IndexCalculus.save from the file with given path."""
+        with open(path) as file:
+            saved = json.load(file)
+
+        prime_factors = [
+            q for q, e in saved["small_part"] + saved["large_part"] for _ in range(e)
+        ]
+
+        # (files saved without the bound: the largest small prime gives the same split)
+        small_prime_bound = saved.get(
+            "small_prime_bound", max((q for q, _ in saved["small_part"]), default=1)
+        )
+
+        # the split of the order (and the CRT built from it) must be the same as when the logarithms were computed
+        index_calculus = cls(
+            saved["generator"],
+            saved["modulus"],
+            saved["smoothness_bound"],
+            prime_factors,
+            small_prime_bound,
+        )
+        index_calculus.logarithms = dict(saved["logarithms"])
+
+        return index_calculus
+
+
+# [2]
+def choose_smoothness_bound(modulus):
+    """Returns the smoothness bound L(p)^(1/sqrt(2)), where L(p) = exp(sqrt(ln p * ln ln p))."""
+    log_p = math.log(modulus)
+    bound = math.exp(math.sqrt(log_p * math.log(log_p) / 2))
+
+    return max(50, int(bound))
+
+
+# [1], [2]
+def collect_relations(generator, modulus, factor_base, count, batch_size=256):
+    """
+    Collects relations generator^k = p_1^e_1 * ... * p_m^e_m (mod modulus) over the factor base.
+
+    Args:
+        generator (int): Represents the base of the DLPs.
+        modulus (int): Prime modulus of the DLPs.
+        factor_base (list): Primes of the factor base.
+        count (int): Number of relations to collect.
+        batch_size (int, optional): Number of candidates tested for smoothness at once. Defaults to 256.
+
+    Returns:
+        list: List of relations (exponents, k), where exponents is a dictionary {index of p_i in factor_base: e_i}.
+    """
+    index_of = {prime: index for index, prime in enumerate(factor_base)}
+    relations = []
+
+    while len(relations) < count:
+        exponents = [random.randrange(1, modulus - 1) for _ in range(batch_size)]
+        candidates = [pow(generator, k, modulus) for k in exponents]
+
+        smooth = factorization.batch_smoothness_test(candidates, factor_base)
+
+        for k, candidate, is_smooth in zip(exponents, candidates, smooth):
+            if not is_smooth:
+                continue
+
+            # only the smooth candidates are factored
+            relation = Counter(
+                index_of[prime] for prime in factorization.trial_division(candidate)
+            )
+            relations.append((dict(relation), k))
+
+    return relations[:count]
+
+
+# [3]
+def solve_sparse_system(rows, right_sides, columns, q, e):
+    """
+    Solves the sparse system of linear congruences by structured Gaussian elimination modulo q^e.
+    The columns are eliminated from the lightest one, the pivots are chosen among the lightest rows.
+
+    Args:
+        rows (list): Rows of the system as dictionaries {column: coefficient}.
+        right_sides (list): Right sides of the congruences.
+        columns (iterable): All the columns (unknowns) of the system.
+        q (int): Prime.
+        e (int): Exponent of the modulus q^e.
+
+    Returns:
+        list: Values of the unknowns modulo q^e (indexed by the columns).
+        None: If the system does not determine all the unknowns.
+    """
+    modulus = q**e
+    rows = [dict(row) for row in rows]
+    right_sides = list(right_sides)
+
+    # rows in which each column appears
+    rows_of = defaultdict(set)
+    for index, row in enumerate(rows):
+        for column in row:
+            rows_of[column].add(index)
+
+    pivots = []
+    used = set()
+
+    for column in sorted(columns, key=lambda column: len(rows_of[column])):
+        candidates = [
+            index
+            for index in rows_of[column]
+            if index not in used and rows[index][column] % q != 0
+        ]
+
+        if not candidates:
+            return None
+
+        pivot = min(candidates, key=lambda index: len(rows[index]))
+        used.add(pivot)
+        pivots.append((column, pivot))
+
+        # normalize the pivot row, so that its coefficient is 1
+        inverse = pow(rows[pivot][column], -1, modulus)
+        rows[pivot] = {c: value * inverse % modulus for c, value in rows[pivot].items()}
+        right_sides[pivot] = right_sides[pivot] * inverse % modulus
+
+        # eliminate the column from all the other unused rows
+        for index in list(rows_of[column]):
+            if index in used:
+                continue
+
+            factor = rows[index][column]
+
+            for c, value in rows[pivot].items():
+                updated = (rows[index].get(c, 0) - factor * value) % modulus
+
+                if updated:
+                    rows[index][c] = updated
+                    rows_of[c].add(index)
+                else:
+                    rows[index].pop(c, None)
+                    rows_of[c].discard(index)
+
+            right_sides[index] = (right_sides[index] - factor * right_sides[pivot]) % modulus
+
+    # back substitution, each pivot row only contains the columns eliminated after it
+    solution = {}
+
+    for column, pivot in reversed(pivots):
+        value = right_sides[pivot] - sum(
+            coefficient * solution[c]
+            for c, coefficient in rows[pivot].items()
+            if c != column
+        )
+        solution[column] = value % modulus
+
+    return [solution[column] for column in sorted(solution)]
@@ -0,0 +1,371 @@
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# The time needed for the key generation varies a lot (it depends on the distance to the next prime).
+# KeyPool keeps a number of ready key pairs (or primes) for each size and refills itself in the background
+# by worker processes, so that the keys are usually handed out without waiting.
+#
+# The ready keys can be saved to a spool file when the pool is closed and loaded again when it is started.
+# The spool is sealed: it is readable by the owner only and authenticated by HMAC-SHA256, so a changed file
+# is rejected. (It is not encrypted, so it has to be kept on a trusted disk.) Every key is handed out at most once,
+# the spool is removed as soon as it is loaded.
+#
+# A failed generation is submitted again. When the generation of one size keeps failing, the pool gives up on the size
+# and get raises the error, instead of waiting for a key that never comes.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+
+
+# put to the queue of a size, whose generation failed (so that the waiting gets wake up and raise the error)
+GenerationFailure = namedtuple("GenerationFailure", ["error"])
+
+
+def generate(kind, bits):
+    """
+    Generates one key pair or prime of given size. (Runs in the worker processes.)
+
+    Args:
+        kind (str): "key_pair" or "prime".
+        bits (int): Number of bits of the modulus (key pair) or of the prime.
+
+    Returns:
+        tuple: Generated key pair ((n, e), PrivateKey).
+        int: Generated prime.
+    """
+    if kind == "prime":
+        return rsa.generate_prime_number(2 ** (bits - 1), 2**bits - 1)
+
+    return rsa.generate_key_pair(*rsa.prime_bounds(bits))
+
+
+class KeyPool:
+    """
+    Pool of ready key pairs (or primes) refilled in the background by worker processes.
+
+    Attributes:
+        kind (str): "key_pair" or "prime".
+        depth (int): Number of ready keys kept for each size.
+        spool (str): Path of the spool file. (None if the keys are not saved.)
+        ready (dict): For each size a queue of ready keys.
+        pending (dict): For each size the number of keys being generated.
+        generated (int): Number of keys generated since the start.
+        retries (int): Number of failed generations of one size in a row, after which the pool gives up on the size.
+        failures (dict): For each size the number of failed generations in a row.
+        errors (dict): For each size the pool gave up on, the error of the last generation.
+        waits (list): Number of gets that had to wait, their total and maximal waiting time (in seconds).
+    """
+
+    def __init__(
+        self,
+        sizes=(1024,),
+        depth=4,
+        kind="key_pair",
+        workers=None,
+        spool=None,
+        spool_key=None,
+        retries=3,
+    ):
+        """
+        Args:
+            sizes (iterable, optional): Sizes (in bits) the keys are kept for. Defaults to (1024,).
+            depth (int, optional): Number of ready keys kept for each size. Defaults to 4.
+            kind (str, optional): "key_pair" or "prime". Defaults to "key_pair".
+            workers (int, optional): Number of worker processes. Defaults to None (number of CPUs).
+            spool (str, optional): Path of the spool file. Defaults to None (keys are not saved).
+            spool_key (bytes, optional): Secret key of the HMAC sealing the spool. (Required with spool.)
+            retries (int, optional): Number of failed generations of one size in a row, after which the pool
+                gives up on the size. Defaults to 3.
+
+        Raises:
+            ValueError: If kind is unknown, or spool is given without spool_key.
+        """
+        if kind not in ("key_pair", "prime"):
+            raise ValueError('Kind must be "key_pair" or "prime".')
+
+        if spool is not None and not spool_key:
+            raise ValueError("Spool requires a secret key for sealing.")
+
+        self.kind = kind
+        self.depth = depth
+        self.spool = spool
+        self.spool_key = spool_key
+        self.workers = workers
+
+        self.ready = {bits: queue.Queue() for bits in sizes}
+        self.pending = dict.fromkeys(self.ready, 0)
+        self.generated = 0
+        self.retries = retries
+        self.failures = dict.fromkeys(self.ready, 0)
+        self.errors = {}
+        self.waits = [0, 0.0, 0.0]
+
+        # (reentrant, a callback of a finished future runs at once in the same thread)
+        self.lock = threading.RLock()
+        self.executor = None
+        self.started = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.close()
+
+    def start(self):
+        """Loads the spool (if there is one) and starts refilling the pool."""
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.started = time.perf_counter()
+
+        if self.spool is not None:
+            for bits, keys in self.load_spool().items():
+                if bits in self.ready:
+                    for key in keys:
+                        self.ready[bits].put(key)
+
+        for bits in self.ready:
+            self.refill(bits)
+
+        return self
+
+    def close(self):
+        """Stops the workers and saves the ready keys to the spool (if there is one)."""
+        executor, self.executor = self.executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if self.spool is not None:
+            keys = {}
+
+            for bits, ready in self.ready.items():
+                keys[bits] = []
+
+                while not ready.empty():
+                    key = ready.get_nowait()
+
+                    if not isinstance(key, GenerationFailure):
+                        keys[bits].append(key)
+
+            self.save_spool(keys)
+
+    def get(self, bits=None, timeout=None):
+        """
+        Returns a ready key of given size, waits for one if the pool is empty.
+
+        Args:
+            bits (int, optional): Size of the key. Defaults to None (the first size of the pool).
+            timeout (float, optional): Maximal number of seconds to wait. Defaults to None (no limit).
+
+        Raises:
+            ValueError: If the pool is not running, or there is no such size.
+            TimeoutError: If no key was ready in time.
+            Exception: The error of the generation, if the pool gave up on the size.
+
+        Returns:
+            tuple: Key pair ((n, e), PrivateKey).
+            int: Prime.
+        """
+        ready = self.queue_of(bits)
+        start = time.perf_counter()
+
+        try:
+            key = ready.get_nowait()
+        except queue.Empty:
+            try:
+                key = ready.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("No key was generated in time.") from None
+
+            waited = time.perf_counter() - start
+
+            with self.lock:
+                self.waits[0] += 1
+                self.waits[1] += waited
+                self.waits[2] = max(self.waits[2], waited)
+
+        return self.handed_out(bits, key)
+
+    def try_get(self, bits=None):
+        """Returns a ready key of given size, or None if the pool is empty. (Never waits, raises as get.)"""
+        try:
+            key = self.queue_of(bits).get_nowait()
+        except queue.Empty:
+            return None
+
+        return self.handed_out(bits, key)
+
+    def handed_out(self, bits, key):
+        """Refills the pool after a key was taken. Raises the error, if the key is a GenerationFailure."""
+        bits = self.size_of(bits)
+
+        if isinstance(key, GenerationFailure):
+            # (put back for the other gets)
+            self.ready[bits].put(key)
+            raise key.error
+
+        self.refill(bits)
+
+        return key
+
+    def size_of(self, bits):
+        """Returns the given size, or the first size of the pool for None."""
+        return next(iter(self.ready)) if bits is None else bits
+
+    def queue_of(self, bits):
+        """Returns the queue of ready keys of given size."""
+        if self.executor is None:
+            raise ValueError("The pool is not running.")
+
+        bits = self.size_of(bits)
+
+        if bits not in self.ready:
+            raise ValueError(f"The pool does not keep keys of {bits} bits.")
+
+        return self.ready[bits]
+
+    def refill(self, bits):
+        """Submits the generation of as many keys as are missing to the depth of the pool."""
+        with self.lock:
+            if self.executor is None or bits in self.errors:
+                return
+
+            missing = self.depth - self.ready[bits].qsize() - self.pending[bits]
+
+            for _ in range(missing):
+                try:
+                    future = self.executor.submit(generate, self.kind, bits)
+                except BrokenProcessPool as error:
+                    self.give_up(bits, error)
+                    return
+
+                self.pending[bits] += 1
+                future.add_done_callback(lambda future, bits=bits: self.store(bits, future))
+
+    def store(self, bits, future):
+        """Puts the generated key to the pool. (Called when a worker is done.)"""
+        with self.lock:
+            self.pending[bits] -= 1
+
+            if future.cancelled():
+                return
+
+            error = future.exception()
+
+            if error is not None:
+                self.failures[bits] += 1
+
+                if self.failures[bits] > self.retries:
+                    self.give_up(bits, error)
+                else:
+                    self.refill(bits)
+
+                return
+
+            self.failures[bits] = 0
+            self.generated += 1
+
+        self.ready[bits].put(future.result())
+
+    def give_up(self, bits, error):
+        """Stops generating keys of given size, the gets of the size raise the error from now on."""
+        with self.lock:
+            if bits in self.errors:
+                return
+
+            self.errors[bits] = error
+
+        self.ready[bits].put(GenerationFailure(error))
+
+    def metrics(self):
+        """
+        Returns the state of the pool.
+
+        Returns:
+            dict: Number of ready and pending keys for each size, refill rate (keys per second),
+                number of gets that had to wait, their mean and maximal waiting time (in seconds),
+                the errors of the sizes the pool gave up on.
+        """
+        with self.lock:
+            elapsed = time.perf_counter() - self.started if self.started else 0
+            waited, total_wait, max_wait = self.waits
+
+            return {
+                "depth": {
+                    bits: ready.qsize() - (bits in self.errors)
+                    for bits, ready in self.ready.items()
+                },
+                "pending": dict(self.pending),
+                "generated": self.generated,
+                "refill_rate": self.generated / elapsed if elapsed else 0.0,
+                "waits": waited,
+                "mean_wait": total_wait / waited if waited else 0.0,
+                "max_wait": max_wait,
+                "errors": {bits: repr(error) for bits, error in self.errors.items()},
+            }
+
+    def seal(self, payload):
+        """Returns the HMAC-SHA256 tag of the payload."""
+        return hmac.new(self.spool_key, payload, hashlib.sha256).hexdigest()
+
+    def save_spool(self, keys):
+        """Saves the keys to the spool file (readable by the owner only), replacing it at once."""
+        payload = json.dumps({"kind": self.kind, "keys": list(keys.items())}).encode()
+        temporary = self.spool + ".tmp"
+
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as file:
+            json.dump({"payload": payload.decode(), "seal": self.seal(payload)}, file)
+
+        os.replace(temporary, self.spool)
+
+    def load_spool(self):
+        """
+        Loads the keys from the spool file and removes it.
+
+        Returns:
+            dict: For each size the list of keys. (Empty if there is no spool, or its seal is broken.)
+        """
+        try:
+            with open(self.spool) as file:
+                sealed = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        # the keys must not be handed out again after another restart
+        os.remove(self.spool)
+
+        payload = sealed.get("payload", "").encode()
+
+        if not hmac.compare_digest(self.seal(payload), sealed.get("seal", "")):
+            return {}
+
+        saved = json.loads(payload)
+
+        if saved["kind"] != self.kind:
+            return {}
+
+        if self.kind == "prime":
+            return {bits: keys for bits, keys in saved["keys"]}
+
+        return {
+            bits: [((n, e), rsa.PrivateKey(*secret)) for (n, e), secret in keys]
+            for bits, keys in saved["keys"]
+        }
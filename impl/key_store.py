@@ -0,0 +1,375 @@
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+
+import primality_testing
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Compact binary format for the keys and primality certificates, and a single file store of them.
+#
+# Record (all the numbers are big-endian):
+#
+#   tag (1 byte), number of integers (1 byte), integers: length (2 bytes) and the bytes of the integer
+#
+#   PUBLIC:       n, e
+#   PRIVATE:      n, e, d, p, q, dp, dq, qinv
+#   MULTI_PRIME:  n, e, d, r_1, ..., r_k
+#   SECRET:       n, e, d (secret key without the primes)
+#   CERTIFICATE:  n, witness, q_1, ..., q_k
+#
+# The store is a sequence of frames: kind (1 byte), length of the payload (8 bytes) and the payload.
+#
+#   RECORD frames:  length of the key id (2 bytes), key id (UTF-8) and the record
+#   INDEX frames:   table of (hash of key id (8 bytes), offset of the RECORD frame (8 bytes)) sorted by hash
+#   FOOTER frame:   offset of the last INDEX frame (always the last 17 bytes of a closed store)
+#
+# Records are only appended. The index is written when the store is flushed (or closed), the lookups do a binary
+# search in the memory mapped index, so a key is loaded by one slice of the map and int.from_bytes.
+# If the store was not closed properly, the records after the last index are found by reading the frames.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Designing Data-Intensive Applications. (2017) ISBN 978-1-449-37332-0.
+
+
+PUBLIC, PRIVATE, MULTI_PRIME, SECRET, CERTIFICATE = range(1, 6)
+RECORD, INDEX, FOOTER = b"R", b"I", b"F"
+
+MAGIC = b"KSTORE01"
+FRAME = struct.Struct(">cQ")
+ENTRY = struct.Struct(">QQ")
+FOOTER_SIZE = FRAME.size + 8
+
+
+def encode_integers(tag, integers):
+    """Encodes the integers into a record with given tag."""
+    parts = [bytes((tag, len(integers)))]
+
+    for integer in integers:
+        data = integer.to_bytes((integer.bit_length() + 7) // 8, "big")
+        parts.append(len(data).to_bytes(2, "big"))
+        parts.append(data)
+
+    return b"".join(parts)
+
+
+def decode_integers(record):
+    """Decodes the record into its tag and the list of integers."""
+    view = memoryview(record)
+    tag, count = view[0], view[1]
+    integers = []
+    position = 2
+
+    for _ in range(count):
+        length = int.from_bytes(view[position : position + 2], "big")
+        position += 2
+        integers.append(int.from_bytes(view[position : position + length], "big"))
+        position += length
+
+    return tag, integers
+
+
+def encode(item):
+    """
+    Encodes the key or certificate into a record.
+
+    Args:
+        item: RSAPublicKey (or tuple (n, e)), RSAPrivateKey or PocklingtonCertificate.
+
+    Returns:
+        bytes: The record.
+    """
+    if isinstance(item, primality_testing.PocklingtonCertificate):
+        return encode_integers(CERTIFICATE, [item.n, item.witness, *item.factors])
+
+    if not isinstance(item, rsa.RSAPrivateKey):
+        return encode_integers(PUBLIC, list(item))
+
+    n, e = item.public_key
+    secret = item.secret
+
+    if isinstance(secret, rsa.PrivateKey):
+        return encode_integers(PRIVATE, [n, e, *secret])
+
+    if isinstance(secret, rsa.MultiPrimeKey):
+        return encode_integers(MULTI_PRIME, [n, e, secret.d, *secret.primes])
+
+    return encode_integers(SECRET, [n, e, secret])
+
+
+def decode(record):
+    """Decodes the record into RSAPublicKey, RSAPrivateKey or PocklingtonCertificate."""
+    tag, integers = decode_integers(record)
+
+    if tag == PUBLIC:
+        return rsa.RSAPublicKey(*integers)
+
+    if tag == PRIVATE:
+        return rsa.RSAPrivateKey.from_secret(integers[:2], rsa.PrivateKey(*integers[2:]))
+
+    if tag == MULTI_PRIME:
+        n, e, d, *primes = integers
+        return rsa.RSAPrivateKey((n, e), d, primes)
+
+    if tag == SECRET:
+        return rsa.RSAPrivateKey(integers[:2], integers[2])
+
+    if tag == CERTIFICATE:
+        n, witness, *factors = integers
+        return primality_testing.PocklingtonCertificate(n, tuple(factors), witness)
+
+    raise ValueError(f"Unknown record tag {tag}.")
+
+
+def id_hash(key_id):
+    """Returns the 64-bit hash of the key id used by the index."""
+    return int.from_bytes(hashlib.blake2b(key_id.encode(), digest_size=8).digest(), "big")
+
+
+class KeyStore:
+    """
+    Single file store of keys and certificates with an on-disk index.
+
+    Attributes:
+        path (str): Path of the store.
+        indexed (int): Number of entries of the index. (Memory mapped.)
+        pending (dict): Offsets of the records appended after the index {key id: offset}.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the store with given path (or creates it).
+
+        Args:
+            path (str): Path of the store.
+
+        Raises:
+            ValueError: If the file is not a store.
+        """
+        self.path = path
+        self.file = open(path, "a+b")
+
+        if self.file.seek(0, os.SEEK_END) == 0:
+            self.file.write(MAGIC)
+            self.file.flush()
+
+        self.map = None
+        self.index_offset = None
+        self.indexed = 0
+        self.pending = {}
+
+        self.open_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return len(self.ids())
+
+    def __contains__(self, key_id):
+        return self.offset_of(key_id) is not None
+
+    def open_index(self):
+        """Maps the file and finds the last index. (Records after it are read into pending.)"""
+        size = self.file.seek(0, os.SEEK_END)
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.map[: len(MAGIC)] != MAGIC:
+            raise ValueError("The file is not a key store.")
+
+        position = len(MAGIC)
+
+        # a properly closed store ends by a footer pointing to the index
+        if size >= len(MAGIC) + FOOTER_SIZE:
+            kind, length = FRAME.unpack_from(self.map, size - FOOTER_SIZE)
+
+            if kind == FOOTER and length == 8:
+                (offset,) = struct.unpack_from(">Q", self.map, size - 8)
+                kind, length = FRAME.unpack_from(self.map, min(offset, size - FOOTER_SIZE))
+
+                if kind == INDEX and offset + FRAME.size + length == size - FOOTER_SIZE:
+                    self.index_offset = offset + FRAME.size
+                    self.indexed = length // ENTRY.size
+                    position = size
+
+        # otherwise the frames are read one by one
+        while position + FRAME.size <= size:
+            kind, length = FRAME.unpack_from(self.map, position)
+
+            if position + FRAME.size + length > size:
+                break
+
+            if kind == RECORD:
+                self.pending[self.record_id(position)] = position
+            elif kind == INDEX:
+                self.index_offset = position + FRAME.size
+                self.indexed = length // ENTRY.size
+                self.pending = {}
+
+            position += FRAME.size + length
+
+        # (a frame cut off by a crash is dropped)
+        if position < size:
+            self.map.close()
+            self.file.truncate(position)
+            self.open_index()
+
+    def record_id(self, offset):
+        """Returns the key id of the RECORD frame at given offset."""
+        start = offset + FRAME.size
+        length = int.from_bytes(self.map[start : start + 2], "big")
+
+        return self.map[start + 2 : start + 2 + length].decode()
+
+    def entry(self, i):
+        """Returns the i-th entry (hash, offset) of the index."""
+        return ENTRY.unpack_from(self.map, self.index_offset + i * ENTRY.size)
+
+    def offset_of(self, key_id):
+        """Returns the offset of the RECORD frame of the key id, None if it is not in the store."""
+        if key_id in self.pending:
+            return self.pending[key_id]
+
+        if not self.indexed:
+            return None
+
+        # binary search in the memory mapped index
+        wanted = id_hash(key_id)
+        hashes = IndexView(self)
+        i = bisect.bisect_left(hashes, wanted)
+
+        # (different ids may have the same hash)
+        while i < self.indexed:
+            hash, offset = self.entry(i)
+
+            if hash != wanted:
+                break
+
+            if self.record_id(offset) == key_id:
+                return offset
+
+            i += 1
+
+        return None
+
+    def get(self, key_id):
+        """
+        Loads the key or certificate with given id.
+
+        Raises:
+            KeyError: If there is no such id in the store.
+
+        Returns:
+            RSAPublicKey, RSAPrivateKey or PocklingtonCertificate: The stored item.
+        """
+        offset = self.offset_of(key_id)
+
+        if offset is None:
+            raise KeyError(key_id)
+
+        return decode(self.read_record(offset))
+
+    def read_record(self, offset):
+        """Returns the record of the RECORD frame at given offset (a slice of the map)."""
+        if offset + FRAME.size > len(self.map):
+            self.remap()
+
+        _, length = FRAME.unpack_from(self.map, offset)
+        start = offset + FRAME.size
+
+        if start + length > len(self.map):
+            self.remap()
+
+        id_length = int.from_bytes(self.map[start : start + 2], "big")
+
+        return self.map[start + 2 + id_length : start + length]
+
+    def put(self, key_id, item):
+        """Appends the key or certificate with given id to the store. (A newer item replaces the older one.)"""
+        encoded_id = key_id.encode()
+        payload = len(encoded_id).to_bytes(2, "big") + encoded_id + encode(item)
+
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(FRAME.pack(RECORD, len(payload)) + payload)
+        self.pending[key_id] = offset
+
+    def ids(self):
+        """Returns the set of all the key ids in the store."""
+        ids = {self.record_id(self.entry(i)[1]) for i in range(self.indexed)}
+
+        return ids | set(self.pending)
+
+    def flush(self):
+        """Appends the new index (the old one merged with the pending records) and the footer."""
+        if not self.pending:
+            self.file.flush()
+            return
+
+        self.file.flush()
+        self.remap()
+
+        # the entries of the replaced ids are left out
+        pending_hashes = {id_hash(key_id) for key_id in self.pending}
+        entries = []
+
+        for i in range(self.indexed):
+            hash, offset = self.entry(i)
+
+            if hash not in pending_hashes or self.record_id(offset) not in self.pending:
+                entries.append((hash, offset))
+
+        entries += [(id_hash(key_id), offset) for key_id, offset in self.pending.items()]
+        entries.sort()
+
+        offset = self.file.seek(0, os.SEEK_END)
+        table = b"".join(ENTRY.pack(*entry) for entry in entries)
+
+        self.file.write(FRAME.pack(INDEX, len(table)) + table)
+        self.file.write(FRAME.pack(FOOTER, 8) + offset.to_bytes(8, "big"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        self.remap()
+        self.index_offset = offset + FRAME.size
+        self.indexed = len(entries)
+        self.pending = {}
+
+    def remap(self):
+        """Maps the file again (after it has grown)."""
+        self.file.flush()
+        self.map.close()
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Writes the index and closes the store."""
+        if self.file.closed:
+            return
+
+        self.flush()
+        self.map.close()
+        self.file.close()
+
+
+class IndexView:
+    """Sequence of the hashes of the index (read from the map), so that bisect can search it."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.indexed
+
+    def __getitem__(self, i):
+        return self.store.entry(i)[0]
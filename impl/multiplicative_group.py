@@ -0,0 +1,192 @@
+import functools
+import math
+from collections import Counter
+
+import factorization
+import primality_testing
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# These algorithms work with the multiplicative group Z*n of integers coprime to n, that is:
+#
+# For given a and n, find the multiplicative order of a, which is the least integer k > 0, that:
+#
+#   a^k = 1 (mod n)
+#
+# and find the primitive roots (generators of Z*n).
+#
+# All of them use the factorization of the group order phi(n), which is computed only once for each n.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [2] A Computational Introduction to Number Theory and Algebra. (2009) (https://www.shoup.net/ntb/)
+
+
+def factor_order(order):
+    """
+    Returns the prime factors of the group order.
+    The trial division is stopped as soon as the remaining cofactor is a (probable) prime.
+
+    Args:
+        order (int): Order of the group.
+
+    Returns:
+        list: List of prime factors of the order.
+    """
+    prime_factors = []
+    cofactor = order
+
+    for prime in factorization.iter_factors(order):
+        prime_factors.append(prime)
+        cofactor //= prime
+
+        if cofactor > 1 and primality_testing.miller_rabin_test(cofactor, 20)[0]:
+            prime_factors.append(cofactor)
+            break
+
+    return prime_factors
+
+
+@functools.lru_cache(maxsize=1024)
+def group_order(n):
+    """
+    Returns the order phi(n) of the group Z*n together with its factorization. (Results are cached.)
+
+    Args:
+        n (int): Modulus of the group. (Must be greater than 1.)
+
+    Returns:
+        tuple: phi(n) and a tuple of pairs (q_i, e_i) for which phi(n) = q_1^e_1 * ... * q_k^e_k.
+    """
+    if primality_testing.miller_rabin_test(n, 20)[0]:
+        phi = n - 1
+        order_factors = Counter(factor_order(phi))
+    else:
+        phi = 1
+        order_factors = Counter()
+
+        # phi(p^e) = p^(e - 1) * (p - 1)
+        for p, e in Counter(factorization.trial_division(n)).items():
+            phi *= p ** (e - 1) * (p - 1)
+            order_factors[p] += e - 1
+            order_factors.update(factor_order(p - 1))
+
+        # remove the primes with zero exponent
+        order_factors = +order_factors
+
+    return phi, tuple(sorted(order_factors.items()))
+
+
+def order_factorization(n, order_factors=None):
+    """Returns phi(n) and its factorization, either from the given prime factors of phi(n), or from the cache."""
+    if order_factors is None:
+        return group_order(n)
+
+    counts = Counter(order_factors)
+
+    return math.prod(order_factors), tuple(sorted(counts.items()))
+
+
+# [1]
+def multiplicative_order(a, n, order_factors=None):
+    """
+    Computes the multiplicative order of a mod n by peeling the prime factors off the group order.
+
+    Args:
+        a (int): Element of the group Z*n.
+        n (int): Modulus of the group.
+        order_factors (list, optional): Prime factors of phi(n). Defaults to None (the cached factorization).
+
+    Raises:
+        ValueError: If a is not coprime to n, it has no multiplicative order.
+
+    Returns:
+        int: The least k > 0, for which a^k = 1 (mod n).
+    """
+    if math.gcd(a, n) != 1:
+        raise ValueError("The element must be coprime to the modulus.")
+
+    if n == 1:
+        return 1
+
+    order, factors = order_factorization(n, order_factors)
+
+    for q, e in factors:
+        # remove q from the order as long as a^order = 1 stays true
+        order //= q**e
+        power = pow(a, order, n)
+
+        while power != 1:
+            power = pow(power, q, n)
+            order *= q
+
+    return order
+
+
+def multiplicative_orders(values, n, order_factors=None):
+    """Computes the multiplicative orders of all the values mod n. (The factorization of phi(n) is shared.)"""
+    if order_factors is None:
+        _, factors = group_order(n)
+        order_factors = [q for q, e in factors for _ in range(e)]
+
+    return [multiplicative_order(a, n, order_factors) for a in values]
+
+
+# [1]
+def is_primitive_root(g, n, order_factors=None):
+    """
+    Tests whether g generates the whole group Z*n.
+
+    Args:
+        g (int): Tested element.
+        n (int): Modulus of the group.
+        order_factors (list, optional): Prime factors of phi(n). Defaults to None (the cached factorization).
+
+    Returns:
+        boolean: True if g is a primitive root mod n.
+    """
+    if math.gcd(g, n) != 1:
+        return False
+
+    order, factors = order_factorization(n, order_factors)
+
+    return all(pow(g, order // q, n) != 1 for q, _ in factors)
+
+
+# [1], [2]
+def find_primitive_root(n, order_factors=None):
+    """
+    Finds the least primitive root mod n.
+
+    Args:
+        n (int): Modulus of the group. (Primitive roots exist for n = 2, 4, p^k and 2p^k, where p is an odd prime.)
+        order_factors (list, optional): Prime factors of phi(n). Defaults to None (the cached factorization).
+
+    Raises:
+        ValueError: If there is no primitive root mod n.
+
+    Returns:
+        int: The least primitive root mod n.
+    """
+    if n in (2, 4):
+        return n - 1
+
+    odd_part = n // 2 if n % 4 == 2 else n
+
+    if (
+        odd_part < 3
+        or factorization.is_even(odd_part)
+        or not primality_testing.miller_rabin_test(odd_part, 20)[0]
+        and len(set(factorization.trial_division(odd_part))) != 1
+    ):
+        raise ValueError(f"There is no primitive root mod {n}.")
+
+    for g in range(2, n):
+        if is_primitive_root(g, n, order_factors):
+            return g
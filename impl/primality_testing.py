@@ -1,7 +1,9 @@
 import math
 import random
+from collections import namedtuple
 
 import factorization
+import multiplicative_group
 
 
 # Use of prime numbers in data encryption
@@ -25,6 +27,11 @@ import factorization
 # [4] https://github.com/Ssophoclis/AKS-algorithm/blob/master/AKS.py
 
 
+# certificate of the Pocklington theorem: prime factors q_i of a divisor F > sqrt(n) - 1 of n - 1 and the base a,
+# for which a^(n-1) = 1 (mod n) and gcd(a^((n-1)/q_i) - 1, n) = 1 (the factors have to be primes themselves)
+PocklingtonCertificate = namedtuple("PocklingtonCertificate", ["n", "factors", "witness"])
+
+
 def trial_division(n, upper_bound=math.inf):
     """
     Deterministic test which decides if n is a prime number.
@@ -295,15 +302,22 @@ def pocklington_theorem_test(n, divisor=None, divisor_fact=None, test_bound=10):
         return n == 2
 
     # if not enough information was given, compute it
+    # (the factoring of n - 1 stops as soon as the factored part is large enough)
     if divisor is None or not is_divisible(n - 1, divisor):
-        divisor = factorization.squfof(n - 1)
-        divisor_fact = factorization.trial_division(divisor)
+        divisor, divisor_fact = 1, []
+
+        for prime in factorization.iter_factors(n - 1):
+            divisor *= prime
+            divisor_fact.append(prime)
+
+            if (divisor + 1) ** 2 > n:
+                break
 
     if divisor_fact is None:
         divisor_fact = factorization.trial_division(divisor)
 
     # test the pocklington theorem
-    if divisor > math.sqrt(n) - 1:
+    if (divisor + 1) ** 2 > n:
         for _ in range(test_bound):
             a = random.randint(2, n - 2)
 
@@ -315,6 +329,66 @@ def pocklington_theorem_test(n, divisor=None, divisor_fact=None, test_bound=10):
     return None
 
 
+# [1]
+def pocklington_certificate(n, test_bound=10):
+    """
+    Finds a certificate of primality of n by the Pocklington theorem. (See pocklington_theorem_test.)
+
+    Args:
+        n (int): An odd integer being tested for primality.
+        test_bound (int, optional): Gives us the upper limit for choices of a's. Defaults to 10.
+
+    Returns:
+        PocklingtonCertificate: The certificate. None if no certificate was found.
+    """
+    divisor, divisor_fact = 1, []
+
+    for prime in factorization.iter_factors(n - 1):
+        divisor *= prime
+        divisor_fact.append(prime)
+
+        if (divisor + 1) ** 2 > n:
+            break
+    else:
+        return None
+
+    for _ in range(test_bound):
+        a = random.randint(2, n - 2)
+
+        if pow(a, n - 1, n) == 1 and is_suitable(a, divisor_fact, n):
+            return PocklingtonCertificate(n, tuple(sorted(set(divisor_fact))), a)
+
+    return None
+
+
+def valid_certificate(certificate):
+    """Checks the Pocklington certificate. (The factors are tested by the Miller-Rabin test.)"""
+    n, factors, a = certificate
+    divisor = 1
+
+    for prime in factors:
+        if (n - 1) % prime != 0 or not miller_rabin_test(prime, 20)[0]:
+            return False
+
+        divisor *= largest_power_dividing(prime, n - 1)
+
+    return (
+        (divisor + 1) ** 2 > n
+        and pow(a, n - 1, n) == 1
+        and is_suitable(a, factors, n)
+    )
+
+
+def largest_power_dividing(prime, n):
+    """Returns the largest power of prime that divides n."""
+    power = 1
+
+    while n % (power * prime) == 0:
+        power *= prime
+
+    return power
+
+
 def is_suitable(a, factorization, n):
     """
     Tests whether a satisfies the second condition of Pocklington theorem.
@@ -329,7 +403,7 @@ def is_suitable(a, factorization, n):
     """
 
     for prime in factorization:
-        if math.gcd(pow(a, (n - 1) // prime, n)) != 1:
+        if math.gcd(pow(a, (n - 1) // prime, n) - 1, n) != 1:
             return False
 
     return True
@@ -455,20 +529,18 @@ def is_perfect_power(n):
 def find_smallest_r(n):
     """Finds the smallest r, such that the order of n mod r > log^2(n)."""
     log_bound = math.floor(math.log(n, 2) ** 2)
-    searching = True
     r = 1
 
-    while searching:
+    while True:
         r += 1
-        searching = False
-
-        # check if order is less than log^2(n)
-        power = 1
-        while power <= log_bound and not searching:
-            if pow(n, power, r) == 0 or pow(n, power, r) == 1:
-                searching = True
-            power += 1
-    return r
+
+        if math.gcd(n, r) == 1:
+            if multiplicative_group.multiplicative_order(n, r) > log_bound:
+                return r
+
+        # n^k = 0 (mod r) for some k <= log^2(n)
+        elif pow(n, log_bound, r) != 0:
+            return r
 
 
 def phi(n):
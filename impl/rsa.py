@@ -1,6 +1,14 @@
+import functools
+import hashlib
 import random
 import math
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+import chinese_remainder
+import factorization
 import primality_testing as primes
 
 
@@ -20,23 +28,159 @@ import primality_testing as primes
 # REMARK: As in the theoretical part of our work, we assume that the message being sent is a integer smaller than n.
 # (n is a part of the sender's public key)
 
+# The secret key is either the decryption exponent d (int), or a PrivateKey, which keeps the primes of the modulus.
+# With a PrivateKey, the secret key operations are done by two exponentiations modulo p and q (each of half size)
+# and the results are joined by the Chinese remainder theorem (Garner's formula), which is about 3-4 times faster.
+# Multi-prime keys (MultiPrimeKey) split the modulus into 3 or 4 primes, the exponentiations are even smaller.
+
 # Sources that were used for implementation purposes (pseudocode, idea, trick):
 # [1] A Graduate Course in Applied Cryptography. (2023) (http://toc.cryptobook.us/)
 # [2] RSA and Public-Key Cryptography. (2002) ISBN 1-58488-338-3
 # [3] Cryptography: Theory and Practice. (2018) ISBN 978-1138197015.
 # [4] Handbook of Applied Cryptography. (1997) ISBN 978-0-8176-8297-2.
+# [5] Twenty Years of Attacks on the RSA Cryptosystem. (1999) (https://crypto.stanford.edu/~dabo/papers/RSA-survey.pdf)
+# [6] The Exact Security of Digital Signatures - How to Sign with RSA and Rabin. (1996) (https://doi.org/10.1007/3-540-68339-9_34)
+# [7] Fast Batch Verification for Modular Exponentiation and Digital Signatures. (1998) (https://doi.org/10.1007/BFb0054130)
+# [8] PKCS #1: RSA Cryptography Specifications Version 2.2. (2016) (https://www.rfc-editor.org/rfc/rfc8017)
+# [9] Strong Primes are Easy to Find. (1984) (https://doi.org/10.1007/3-540-39757-4_19)
+
+
+# secret key with the CRT parameters: dp = d mod (p - 1), dq = d mod (q - 1) and qinv = q^(-1) mod p
+PrivateKey = namedtuple("PrivateKey", ["d", "p", "q", "dp", "dq", "qinv"])
+
+# secret key of a multi-prime modulus: the exponents d mod (r_i - 1) and the precomputed CRT of the primes r_i
+MultiPrimeKey = namedtuple("MultiPrimeKey", ["d", "primes", "exponents", "crt"])
+
+# result of the prime search: the prime, number of candidates scanned and number of strong tests run
+PrimeSearch = namedtuple("PrimeSearch", ["prime", "candidates", "tests"])
+
+
+class RSAPublicKey:
+    """
+    Public key of RSA. (It can be used everywhere in place of the tuple (n, e).)
+
+    Attributes:
+        n (int): Modulus.
+        e (int): Encryption exponent.
+    """
+
+    __slots__ = ("n", "e", "_byte_length")
+
+    def __init__(self, n, e):
+        self.n = n
+        self.e = e
+        self._byte_length = None
+
+    def __iter__(self):
+        return iter((self.n, self.e))
+
+    def __eq__(self, other):
+        if isinstance(other, (RSAPublicKey, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.n, self.e))
+
+    def __repr__(self):
+        return f"RSAPublicKey(n={self.n}, e={self.e})"
+
+    @property
+    def byte_length(self):
+        """Number of bytes of the modulus. (Cached.)"""
+        if self._byte_length is None:
+            self._byte_length = (self.n.bit_length() + 7) // 8
+        return self._byte_length
+
+
+class RSAPrivateKey:
+    """
+    Secret key of RSA together with its public key. The CRT parameters are computed once, when they are first needed.
+
+    Attributes:
+        public_key (RSAPublicKey): The public key.
+        primes (tuple): Primes of the modulus. (Empty if only d is known.)
+    """
+
+    __slots__ = ("public_key", "primes", "_d", "_secret")
+
+    def __init__(self, public_key, d=None, primes=()):
+        """
+        Args:
+            public_key (RSAPublicKey or tuple): The public key (n, e).
+            d (int, optional): Decryption exponent. Defaults to None (computed from the primes).
+            primes (iterable, optional): Primes of the modulus. Defaults to () (the CRT is not used).
+
+        Raises:
+            ValueError: If neither d nor the primes are given.
+        """
+        if d is None and not primes:
+            raise ValueError("Either the decryption exponent or the primes must be given.")
+
+        self.public_key = RSAPublicKey(*public_key)
+        self.primes = tuple(primes)
+        self._d = d
+        self._secret = None
+
+    @classmethod
+    def from_secret(cls, public_key, secret):
+        """Creates the key from a secret key in the form used by the functions of this module (int, PrivateKey or MultiPrimeKey)."""
+        if isinstance(secret, PrivateKey):
+            key = cls(public_key, secret.d, (secret.p, secret.q))
+        elif isinstance(secret, MultiPrimeKey):
+            key = cls(public_key, secret.d, secret.primes)
+        else:
+            return cls(public_key, secret)
+
+        key._secret = secret
+        return key
+
+    def __eq__(self, other):
+        if isinstance(other, RSAPrivateKey):
+            return (self.public_key, self.d) == (other.public_key, other.d)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.public_key, self.d))
+
+    def __repr__(self):
+        # (the secret values are not shown)
+        return f"RSAPrivateKey(n={self.public_key.n}, e={self.public_key.e})"
+
+    @property
+    def d(self):
+        """Decryption exponent. (Cached.)"""
+        if self._d is None:
+            self._d = pow(self.public_key.e, -1, math.prod(r - 1 for r in self.primes))
+        return self._d
+
+    @property
+    def secret(self):
+        """The secret key used by private_power: PrivateKey, MultiPrimeKey, or d without the primes. (Cached.)"""
+        if self._secret is None:
+            e = self.public_key.e
+
+            if len(self.primes) == 2:
+                self._secret = private_key(*self.primes, e)
+            elif self.primes:
+                self._secret = multi_prime_key(self.primes, e)
+            else:
+                self._secret = self.d
+
+        return self._secret
 
 
 # [1], [2]
-def encrypt(message, others_kp, mine_kp, mine_ks):
+def encrypt(message, others_kp, mine_kp, mine_ks, check=False):
     """
     Encrypts a message in RSA. (Including digital signatures.)
 
     Args:
         message (int):A number representing a message we want to send.
-        others_kp (tuple): Public key of the recipient.
-        mine_kp (tuple): Public key of the user encrypting.
-        mine_ks (int): Secret key of the user encrypting.
+        others_kp (tuple or RSAPublicKey): Public key of the recipient.
+        mine_kp (tuple or RSAPublicKey): Public key of the user encrypting.
+        mine_ks (int, PrivateKey, MultiPrimeKey or RSAPrivateKey): Secret key of the user encrypting.
+        check (bool, optional): Verify the signature before it is sent (see private_power). Defaults to False.
 
     Raises:
         ValueError: If message is not of wanted length (must be < n, where n is a part of mine_kp).
@@ -56,44 +200,140 @@ def encrypt(message, others_kp, mine_kp, mine_ks):
     cipher = pow(message, e, n)
 
     # signing
-    digital_signature = sign_message(message, mine_kp, mine_ks)
+    digital_signature = sign_message(message, mine_kp, mine_ks, check)
 
     return cipher, digital_signature
 
 
 # [3]
-def sign_message(message, mine_kp, mine_ks):
-    """Signs the given message. (Based on the RSA signature scheme.)"""
+def sign_message(message, mine_kp, mine_ks, check=False, algorithm="sha256"):
+    """
+    Signs the given message. (Based on the RSA signature scheme.)
+    The message can be an integer, string, bytes, or a binary file-like object (read in chunks).
+    """
     n, _ = mine_kp
 
-    hash = make_hash_of(message)
-    signature = pow(hash, mine_ks, n)
+    hash = make_hash_of(message, n, algorithm)
+    signature = private_power(hash, mine_kp, mine_ks, check)
 
     return signature
 
 
-def make_hash_of(message):
-    """This function returns the hash of given message."""
+# [4], [6]
+def make_hash_of(message, n=None, algorithm="sha256", chunk_size=2**16):
+    """
+    Computes the hash of given message by hashlib. Large messages are hashed in chunks.
+
+    Args:
+        message (int, str, bytes or file): The message. (Binary file-like objects are read to the end.)
+        n (int, optional): If given, the digest is expanded to the size of n and reduced into the range [0, n). Defaults to None.
+        algorithm (str, optional): Name of the hash function ("sha256", "sha512", ...). Defaults to "sha256".
+        chunk_size (int, optional): Number of bytes read from a file at once. Defaults to 2**16.
+
+    Returns:
+        int: The hash of the message (reduced modulo n, if n is given).
+    """
+    hash = hashlib.new(algorithm)
+
+    if isinstance(message, int):
+        hash.update(message.to_bytes(max(1, (message.bit_length() + 7) // 8), "big"))
+    elif isinstance(message, str):
+        hash.update(message.encode())
+    elif isinstance(message, (bytes, bytearray, memoryview)):
+        hash.update(message)
+    else:
+        for chunk in iter(lambda: message.read(chunk_size), b""):
+            hash.update(chunk)
+
+    digest = hash.digest()
+
+    if n is None:
+        return int.from_bytes(digest, "big")
+
+    # full domain hash: the digest is expanded (64 bits more than n, so that the reduction is almost uniform)
+    length = (n.bit_length() + 7) // 8 + 8
+    expanded = b"".join(
+        hashlib.new(algorithm, digest + counter.to_bytes(4, "big")).digest()
+        for counter in range(-(-length // hash.digest_size))
+    )
+
+    return int.from_bytes(expanded[:length], "big") % n
+
+
+# [7]
+def verify_batch(messages, signatures, others_kp, algorithm="sha256"):
+    """
+    Verifies many signatures made by the same key at once.
+    First the whole batch is screened: (s_1 * ... * s_k)^e = h_1 * ... * h_k (mod n), which costs one exponentiation
+    and two multiplications for each signature. Only if the batch fails, each signature is verified on its own.
+
+    REMARK: Passing the screening means that every message was signed by the owner of the key, but the signatures
+    themselves do not have to be valid (for example s_1 * x and s_2 * x^(-1) pass). Use valid_signature,
+    when the signatures are stored or passed on.
+
+    Args:
+        messages (list): Signed messages. (Integers, strings, bytes or binary file-like objects.)
+        signatures (list): Signatures of the messages.
+        others_kp (tuple or RSAPublicKey): Public key of the user that signed the messages.
+        algorithm (str, optional): Name of the hash function. Defaults to "sha256".
+
+    Raises:
+        ValueError: If the numbers of messages and signatures differ.
+
+    Returns:
+        list: For each signature the answer to the question: Is it valid?
+    """
+    n, e = others_kp
+
+    hashes = [make_hash_of(message, n, algorithm) for message in messages]
+    signatures = list(signatures)
+
+    if len(hashes) != len(signatures):
+        raise ValueError("Every message must have exactly one signature.")
+
+    if all(0 < signature < n for signature in signatures):
+        signature_product = 1
+        hash_product = 1
+
+        for signature, hash in zip(signatures, hashes):
+            signature_product = signature_product * signature % n
+            hash_product = hash_product * hash % n
 
-    # this hash function returns the same message without damage
-    # this function can be changed anytime with a proper choice of hash function anytime
-    return hash(message)
+        if pow(signature_product, e, n) == hash_product:
+            return [True] * len(signatures)
+
+    # the batch failed, find the invalid signatures
+    return [pow(signature, e, n) == hash for signature, hash in zip(signatures, hashes)]
+
+
+def sign_file(path, mine_kp, mine_ks, check=False, algorithm="sha256"):
+    """Signs the file with given path. (The file is read in chunks.)"""
+    with open(path, "rb") as file:
+        return sign_message(file, mine_kp, mine_ks, check, algorithm)
+
+
+def valid_file_signature(path, signature, others_kp, algorithm="sha256"):
+    """Makes sure that the signature of the file with given path is valid. (The file is read in chunks.)"""
+    with open(path, "rb") as file:
+        return valid_signature(file, signature, others_kp, algorithm)
 
 
 # [1], [2]
-def decrypt(cipher_pair, others_kp, mine_kp, mine_ks):
+def decrypt(cipher_pair, others_kp, mine_kp, mine_ks, check=False):
     """
     Decrypts the received cipher_pair in RSA. (Including digital signatures.)
 
     Args:
         cipher_pair (tuple): The pair representing the cipher (ciphered message and a signature) sent to us.
-        others_kp (tuple): Public key of the user that sent the message.
-        mine_kp (tuple): Public key of the user decrypting.
-        mine_ks (int): Secret key of the user decrypting.
+        others_kp (tuple or RSAPublicKey): Public key of the user that sent the message.
+        mine_kp (tuple or RSAPublicKey): Public key of the user decrypting.
+        mine_ks (int, PrivateKey, MultiPrimeKey or RSAPrivateKey): Secret key of the user decrypting.
+        check (bool, optional): Verify the decrypted message (see private_power). Defaults to False.
 
     Raises:
         ValueError: If the message was changed, or signed falsely.
         ValueError: If message is not of wanted length (must be < n, where n is a part of mine_kp).
+        ValueError: If the check of the CRT computation fails.
 
     Returns:
         int: The decrypted message.
@@ -108,7 +348,7 @@ def decrypt(cipher_pair, others_kp, mine_kp, mine_ks):
         )
 
     # decryption
-    message = pow(cipher, mine_ks, n)
+    message = private_power(cipher, mine_kp, mine_ks, check)
 
     # signing
     if not valid_signature(message, signature, others_kp):
@@ -119,73 +359,499 @@ def decrypt(cipher_pair, others_kp, mine_kp, mine_ks):
 
 
 # [3]
-def valid_signature(message, signature, others_kp):
-    """Makes sure that the signature is valid. (Based on the RSA signature scheme.)"""
+def valid_signature(message, signature, others_kp, algorithm="sha256"):
+    """
+    Makes sure that the signature is valid. (Based on the RSA signature scheme.)
+    The message can be an integer, string, bytes, or a binary file-like object (read in chunks).
+    """
     n, e = others_kp
 
     signature = pow(signature, e, n)
-    hash = make_hash_of(message)
+    hash = make_hash_of(message, n, algorithm)
 
     return hash == signature
 
 
+# [4], [5]
+def private_power(x, mine_kp, mine_ks, check=False):
+    """
+    Computes x^d mod n, where d is the secret exponent. (Used for both decryption and signing.)
+
+    Args:
+        x (int): Number smaller than n.
+        mine_kp (tuple or RSAPublicKey): Public key (n, e) of the owner of the secret key.
+        mine_ks (int, PrivateKey, MultiPrimeKey or RSAPrivateKey): Secret key. (The exponent d, or a key with the CRT parameters.)
+        check (bool, optional): Verify that result^e = x (mod n), so that a fault in the CRT computation
+            cannot reveal the primes (Bellcore attack). Defaults to False.
+
+    Raises:
+        ValueError: If the check fails.
+
+    Returns:
+        int: x^d mod n.
+    """
+    n, e = mine_kp
+
+    if isinstance(mine_ks, RSAPrivateKey):
+        mine_ks = mine_ks.secret
+
+    if isinstance(mine_ks, PrivateKey):
+        _, p, q, dp, dq, qinv = mine_ks
+
+        # two half size exponentiations
+        m_p = pow(x % p, dp, p)
+        m_q = pow(x % q, dq, q)
+
+        # Garner's formula joins them into the result mod n = p * q
+        h = qinv * (m_p - m_q) % p
+        result = m_q + h * q
+    elif isinstance(mine_ks, MultiPrimeKey):
+        # one small exponentiation for each prime, joined by Garner's algorithm
+        result = mine_ks.crt.solve(
+            [pow(x % r, d_r, r) for r, d_r in zip(mine_ks.primes, mine_ks.exponents)]
+        )
+    else:
+        return pow(x, mine_ks, n)
+
+    if check and pow(result, e, n) != x % n:
+        raise ValueError("The CRT computation failed. (The result was not released.)")
+
+    return result
+
+
+def private_key(p, q, e):
+    """
+    Computes the secret key with the CRT parameters.
+
+    Args:
+        p (int): First prime of the modulus.
+        q (int): Second prime of the modulus.
+        e (int): Encryption exponent.
+
+    Returns:
+        PrivateKey: The secret key (d, p, q, dp, dq, qinv).
+    """
+    d = pow(e, -1, (p - 1) * (q - 1))
+
+    return PrivateKey(d, p, q, d % (p - 1), d % (q - 1), pow(q, -1, p))
+
+
+# [8]
+def multi_prime_key(primes, e):
+    """
+    Computes the secret key of the modulus with given (distinct) primes.
+
+    Args:
+        primes (list): Primes of the modulus.
+        e (int): Encryption exponent.
+
+    Returns:
+        MultiPrimeKey: The secret key (d, primes, exponents d mod (r_i - 1), CRT of the primes).
+    """
+    d = pow(e, -1, math.prod(r - 1 for r in primes))
+
+    return MultiPrimeKey(
+        d, tuple(primes), tuple(d % (r - 1) for r in primes), chinese_remainder.CRTContext(primes)
+    )
+
+
 # [1], [2]
-def generate_key_pair(min, max):
+def generate_key_pair(min, max, e=65537, count=2):
     """
     Follows the key generation protocol of RSA.
 
     Args:
         min (int): Minimal size of the probable prime used in the key generation.
         max (int): Maximal size of the probable prime used in the key generation.
+        e (int, optional): Encryption exponent. Defaults to 65537. (None picks a random one.)
+        count (int, optional): Number of primes of the modulus. Defaults to 2. (3 or 4 give a MultiPrimeKey.)
 
     Returns:
-        tuple: First position of tuple is a tuple which is the generated public key. The second position is the generated secret key.
+        tuple: First position of tuple is a tuple which is the generated public key. The second position is the generated secret key (PrivateKey or MultiPrimeKey).
     """
-    p = generate_prime_number(min, max)
-    q = generate_prime_number(min, max)
+    primes = []
+
+    # with a fixed e, primes r for which e divides r - 1 are skipped (e has no inverse mod phi(n) then)
+    # (the CRT needs different primes)
+    while len(primes) < count:
+        r = generate_prime_number(min, max)
 
-    n = p * q
-    phi_n = (p - 1) * (q - 1)
+        if r not in primes and (e is None or math.gcd(e, r - 1) == 1):
+            primes.append(r)
+
+    n = math.prod(primes)
+    phi_n = math.prod(r - 1 for r in primes)
 
     # calculate encryption exponent
-    # (notice we do not care about the effectivity
-    # as we do not necessarily pick small values)
-    e = random.randint(2, phi_n)
-    while math.gcd(e, phi_n) != 1:
+    # (a small fixed e makes the encryption and the verification of signatures fast,
+    # a random e is a full size exponent)
+    if e is None:
         e = random.randint(2, phi_n)
+        while math.gcd(e, phi_n) != 1:
+            e = random.randint(2, phi_n)
+
+    # find decryption exponent (with the CRT parameters)
+    if count == 2:
+        return ((n, e), private_key(*primes, e))
+
+    return ((n, e), multi_prime_key(primes, e))
+
+
+def generate_keys(min, max, e=65537, count=2):
+    """Follows the key generation protocol of RSA. (Same as generate_key_pair, returns RSAPublicKey and RSAPrivateKey.)"""
+    public_key, secret = generate_key_pair(min, max, e, count)
+
+    return RSAPublicKey(*public_key), RSAPrivateKey.from_secret(public_key, secret)
+
+
+def prime_bounds(bits, count=2):
+    """Returns the bounds for the primes, so that the product of count of them has exactly given number of bits."""
+    return integer_root(2 ** (bits - 1), count) + 1, integer_root(2**bits - 1, count)
+
 
-    # find decryption exponent
-    d = pow(e, -1, phi_n)
+def integer_root(n, k):
+    """Returns the integer part of the k-th root of n. (Newton's method.)"""
+    x = 1 << -(-n.bit_length() // k)
 
-    return ((n, e), d)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+
+        if y >= x:
+            return x
+
+        x = y
 
 
 # [4]
-def generate_prime_number(bottom_limit, top_limit, test_bound=1000000):
+def generate_prime_number(bottom_limit, top_limit, test_bound=20):
     """
-    Generates a probable prime in the given range.
+    Generates a probable prime in the given range. (See search_prime.)
 
     Args:
         bottom_limit (int): Minimal size of the probable prime.
         top_limit (int): Maximal size of the probable prime.
-        test_bound (int, optional): The upper limit used in primality tests. Defaults to 1000000.
+        test_bound (int, optional): Number of Miller-Rabin rounds the found prime has to pass. Defaults to 20.
 
     Returns:
         int: A probable prime.
     """
-    n = random.randint(bottom_limit, top_limit)
-    test_bound = min(test_bound, math.isqrt(top_limit))
+    return search_prime(bottom_limit, top_limit, test_bound=test_bound).prime
+
+
+# [4]
+def search_prime(bottom_limit, top_limit, test_bound=20, sieve_bound=2**13, window=2**10):
+    """
+    Finds a probable prime by an incremental search from a random odd start.
+    The candidates are sieved by the small primes a window at a time (the residues of the start
+    are updated incrementally) and only the survivors are tested by one Miller-Rabin round.
+
+    Args:
+        bottom_limit (int): Minimal size of the probable prime.
+        top_limit (int): Maximal size of the probable prime.
+        test_bound (int, optional): Number of Miller-Rabin rounds the found prime has to pass. Defaults to 20.
+        sieve_bound (int, optional): The candidates are sieved by the odd primes up to this bound. Defaults to 2**13.
+        window (int, optional): Number of odd candidates sieved at once. Defaults to 2**10.
+
+    Raises:
+        ValueError: If there is no prime in the given range.
+
+    Returns:
+        PrimeSearch: The probable prime, number of candidates scanned and number of strong tests run.
+    """
+    if bottom_limit <= 2 <= top_limit and top_limit < 3:
+        return PrimeSearch(2, 1, 0)
+
+    # odd candidates first, first + 2, ..., last
+    first = max(bottom_limit, 3) | 1
+    last = top_limit if primes.is_odd(top_limit) else top_limit - 1
+    count = (last - first) // 2 + 1
+
+    if count <= 0:
+        raise ValueError("There is no prime in the given range.")
+
+    # (a small prime can only be excluded, if it is smaller than all the candidates)
+    sieve_primes = [p for p in small_primes(sieve_bound) if 2 < p < first]
+
+    index = random.randrange(count)
+    start = first + 2 * index
+    residues = [start % p for p in sieve_primes]
+
+    scanned = 0
+    tests = 0
+
+    while scanned < count:
+        size = min(window, count - index, count - scanned)
+        composite = bytearray(size)
+
+        # start + 2k = 0 (mod p) for k = -start * 2^(-1) (mod p)
+        for p, r in zip(sieve_primes, residues):
+            k = -r * (p + 1) // 2 % p
+            composite[k::p] = b"\x01" * len(range(k, size, p))
+
+        for k in range(size):
+            if composite[k]:
+                continue
+
+            n = start + 2 * k
+            tests += 1
+
+            # one strong test for each survivor, the rest of the rounds only for the prime
+            if primes.miller_rabin_test(n, 1)[0] and primes.miller_rabin_test(n, test_bound - 1)[0]:
+                return PrimeSearch(n, scanned + k + 1, tests)
+
+        scanned += size
+        index += size
+
+        # continue from the beginning of the range
+        if index == count:
+            index = 0
+            start = first
+            residues = [start % p for p in sieve_primes]
+        else:
+            start += 2 * size
+            residues = [(r + 2 * size) % p for p, r in zip(sieve_primes, residues)]
+
+    raise ValueError("There is no prime in the given range.")
+
+
+@functools.lru_cache(maxsize=4)
+def small_primes(bound):
+    """Returns the primes smaller than bound. (Results are cached.)"""
+    return factorization.find_small_primes(bound)
+
+
+# [4]
+def generate_safe_prime(bits, workers=None, window=2**12):
+    """
+    Generates a safe prime p = 2q + 1 (q is a prime too) with given number of bits.
+    The candidates q are sieved for q and 2q + 1 at once: q is rejected if q = 0 or q = (r - 1) / 2 (mod r)
+    for a small prime r. Both q and p are then tested by the Miller-Rabin test.
+
+    Args:
+        bits (int): Number of bits of p. (At least 3.)
+        workers (int, optional): Number of worker processes searching from different starts.
+            Defaults to None (number of CPUs from POOL_BITS bits, otherwise no processes).
+        window (int, optional): Number of candidates searched from one start. Defaults to 2**12.
+
+    Raises:
+        ValueError: If bits is smaller than 3.
+
+    Returns:
+        int: A safe (probable) prime.
+    """
+    if bits < 3:
+        raise ValueError("Safe primes have at least 3 bits.")
+
+    return first_found(safe_prime_attempt, bits, window, workers)
+
+
+# [4], [9]
+def generate_strong_prime(bits, workers=None, window=2**12):
+    """
+    Generates a strong prime p by Gordon's algorithm: p - 1 has a large prime factor r, p + 1 has a large prime
+    factor s and r - 1 has a large prime factor t. The candidates p = p_0 + 2jrs are sieved by the small primes.
+
+    Args:
+        bits (int): Number of bits of p. (At least 64.)
+        workers (int, optional): Number of worker processes searching from different starts.
+            Defaults to None (number of CPUs from POOL_BITS bits, otherwise no processes).
+        window (int, optional): Number of candidates searched from one start. Defaults to 2**12.
+
+    Raises:
+        ValueError: If bits is smaller than 64.
+
+    Returns:
+        int: A strong (probable) prime.
+    """
+    if bits < 64:
+        raise ValueError("Strong primes are generated with at least 64 bits.")
+
+    return first_found(strong_prime_attempt, bits, window, workers)
+
+
+POOL_BITS = 1024
+
+
+def first_found(attempt, bits, window, workers):
+    """Runs the attempts (with different seeds) until one of them finds a prime. (In parallel for more workers.)"""
+    seeds = random.Random()
+
+    if workers is None:
+        workers = (os.cpu_count() or 1) if bits >= POOL_BITS else 1
+
+    if workers == 1:
+        while True:
+            prime = attempt(bits, window, seeds.getrandbits(64))
+
+            if prime is not None:
+                return prime
+
+    stop_event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=set_stop_event, initargs=(stop_event,)
+    )
+
+    try:
+        running = {
+            executor.submit(attempt, bits, window, seeds.getrandbits(64))
+            for _ in range(workers)
+        }
+
+        while True:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            found = [future.result() for future in done if future.result() is not None]
+
+            if found:
+                return found[0]
+
+            running |= {
+                executor.submit(attempt, bits, window, seeds.getrandbits(64))
+                for _ in done
+            }
+    finally:
+        # the running attempts stop at their next candidate, the prime is returned without waiting for them
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# the event that tells the attempts running in a worker process to stop
+stop_search = None
+
+
+def set_stop_event(event):
+    """Shares the stop event with the attempts in a worker process."""
+    global stop_search
+    stop_search = event
+
+
+def stopped():
+    """Returns True if another attempt has already found the prime."""
+    return stop_search is not None and stop_search.is_set()
+
+
+def safe_prime_attempt(bits, window, seed):
+    """Searches window candidates q from a random start. Returns the safe prime 2q + 1, or None."""
+    generator = random.Random(seed)
+
+    # the odd candidates below miss q = 2, so 5 is chosen here
+    if bits == 3:
+        return generator.choice((5, 7))
+
+    # q has bits - 1 bits
+    low, high = 2 ** (bits - 2), 2 ** (bits - 1)
+    start = generator.randrange(low, high) | 1
+    count = min(window, (high - start + 1) // 2)
+
+    return progression_prime(
+        start,
+        2,
+        forms=((1, 0), (2, 1)),
+        count=count,
+        # (one round for both first, most of the survivors are composite)
+        test=lambda q: primes.miller_rabin_test(q, 1)[0]
+        and primes.miller_rabin_test(2 * q + 1, 1)[0]
+        and primes.miller_rabin_test(q, 19)[0]
+        and primes.miller_rabin_test(2 * q + 1, 19)[0],
+        result=lambda q: 2 * q + 1,
+    )
+
+
+# [4], [9]
+def strong_prime_attempt(bits, window, seed):
+    """Follows Gordon's algorithm from random primes s and t. Returns the strong prime, or None."""
+    generator = random.Random(seed)
+    half = bits // 2
+
+    # 1. large primes s and t
+    s = random_prime(half - 8, generator)
+    t = random_prime(half - 16, generator)
+
+    if s is None or t is None:
+        return None
+
+    # 2. the first prime r = 2it + 1
+    i = generator.getrandbits(8) | 1
+    r = progression_prime(2 * i * t + 1, 2 * t, forms=((1, 0),))
+
+    if r is None:
+        return None
+
+    # 3. p_0 = 2(s^(r-2) mod r)s - 1, so that p_0 = 1 (mod r) and p_0 = -1 (mod s)
+    p_0 = 2 * pow(s, r - 2, r) * s - 1
+
+    # 4. the first prime p = p_0 + 2jrs with given number of bits
+    step = 2 * r * s
+    j = -(-(2 ** (bits - 1) - p_0) // step) + generator.randrange(2 ** max(0, bits - step.bit_length() - 1))
+    start = p_0 + j * step
+    count = min(window, (2**bits - start) // step)
+
+    return progression_prime(start, step, forms=((1, 0),), count=count)
+
+
+def random_prime(bits, generator):
+    """Returns a random (probable) prime with given number of bits (the random start is taken from generator), None if stopped."""
+    while not stopped():
+        start = generator.randrange(2 ** (bits - 1), 2**bits) | 1
+        prime = progression_prime(start, 2, forms=((1, 0),), count=(2**bits - start + 1) // 2)
+
+        if prime is not None:
+            return prime
+
+    return None
+
+
+def progression_prime(start, step, forms, count=None, test=None, result=None, sieve_bound=2**13, window=2**10):
+    """
+    Finds the first term x = start + k * step, for which all a * x + b (for (a, b) in forms) are probable primes.
+    The terms are sieved by the small primes a window at a time, so that the test runs for the survivors only.
+
+    Args:
+        start (int): The first term.
+        step (int): Difference of the terms.
+        forms (tuple): Pairs (a, b) of the linear forms a * x + b, which must be primes.
+        count (int, optional): Number of terms searched. Defaults to None (no limit).
+        test (function, optional): Test of the survivors. Defaults to None (one Miller-Rabin round, then 19 more).
+        result (function, optional): Maps the found term to the returned value. Defaults to None (the term itself).
+        sieve_bound (int, optional): The terms are sieved by the primes up to this bound. Defaults to 2**13.
+        window (int, optional): Number of terms sieved at once. Defaults to 2**10.
+
+    Returns:
+        int: The first term passing the test (mapped by result), or None if no term of count terms passes
+            (or another attempt has already found a prime, see first_found).
+    """
+    if test is None:
+        test = lambda x: primes.miller_rabin_test(x, 1)[0] and primes.miller_rabin_test(x, 19)[0]
+
+    # (a small prime can only be excluded, if it is smaller than all the terms)
+    sieve_primes = [r for r in small_primes(sieve_bound) if r < start and step % r != 0]
+    searched = 0
+
+    while count is None or searched < count:
+        size = window if count is None else min(window, count - searched)
+        composite = bytearray(size)
+
+        # a * (start + k * step) + b = 0 (mod r) for k = -(a * start + b) * (a * step)^(-1) (mod r)
+        for r in sieve_primes:
+            for a, b in forms:
+                if a % r == 0:
+                    continue
+
+                k = -(a * start + b) * pow(a * step, -1, r) % r
+                composite[k::r] = b"\x01" * len(range(k, size, r))
+
+        for k in range(size):
+            x = start + k * step
+
+            if composite[k]:
+                continue
 
-    # to save extra generating
-    if primes.is_even(n):
-        n += 1
+            if stopped():
+                return None
 
-    # test if it has small prime factors
-    if not primes.trial_division(n, upper_bound=test_bound):
-        return generate_prime_number(bottom_limit, top_limit)
+            if test(x):
+                return x if result is None else result(x)
 
-    # test with miller-rabin
-    if not primes.miller_rabin_test(n, test_bound=test_bound):
-        return generate_prime_number(bottom_limit, top_limit)
+        start += size * step
+        searched += size
 
-    return n
+    return None
@@ -0,0 +1,303 @@
+import hashlib
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Streaming RSA encryption of byte payloads of any length.
+#
+# The payload is read from a file-like object in chunks, each chunk is split into blocks that fit the modulus
+# of the recipient, every block is padded (OAEP with SHA-256) and encrypted. The chunks can be processed by worker
+# processes, only a bounded number of them is in progress at once, so the memory used does not depend on the size
+# of the payload. The blocks are sliced from the chunks by memoryview (without copying).
+#
+# Format of the output:
+#
+#   header:  MAGIC (4 bytes), byte length k of the modulus (4 bytes)
+#   frames:  length (4 bytes) and the encrypted blocks of one chunk (each of k bytes)
+#   end:     frame of length 0 (a truncated stream is detected)
+
+# REMARK: RSA is slow for bulk data. In practice, the payload is encrypted by a symmetric cipher and only its key by RSA.
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] PKCS #1: RSA Cryptography Specifications Version 2.2. (2016) (https://www.rfc-editor.org/rfc/rfc8017)
+# [2] A Graduate Course in Applied Cryptography. (2023) (http://toc.cryptobook.us/)
+
+
+MAGIC = b"RSAS"
+HASH_LENGTH = hashlib.sha256().digest_size
+FRAME = struct.Struct(">I")
+
+
+def block_sizes(public_key):
+    """Returns the byte length k of the modulus and the maximal number of payload bytes in one block."""
+    n, _ = public_key
+    k = (n.bit_length() + 7) // 8
+
+    if k < 2 * HASH_LENGTH + 3:
+        raise ValueError(
+            f"The modulus must have at least {8 * (2 * HASH_LENGTH + 3)} bits for OAEP padding."
+        )
+
+    return k, k - 2 * HASH_LENGTH - 2
+
+
+def encrypt_stream(
+    source, target, public_key, workers=1, blocks_per_chunk=64, chunks_in_flight=None
+):
+    """
+    Encrypts the bytes read from source and writes the framed cipher to target.
+
+    Args:
+        source (file): Binary file-like object the payload is read from.
+        target (file): Binary file-like object the cipher is written to.
+        public_key (tuple): Public key (n, e) of the recipient.
+        workers (int, optional): Number of worker processes. (1 means no processes.) Defaults to 1.
+        blocks_per_chunk (int, optional): Number of blocks encrypted by one task. Defaults to 64.
+        chunks_in_flight (int, optional): Maximal number of chunks in progress. Defaults to None (2 * workers).
+
+    Raises:
+        ValueError: If the modulus is too small for the padding.
+
+    Returns:
+        int: Number of bytes of the payload.
+    """
+    k, data_size = block_sizes(public_key)
+    target.write(MAGIC + FRAME.pack(k))
+
+    chunks = read_chunks(source, data_size * blocks_per_chunk)
+    total = 0
+
+    for cipher, length in process_chunks(
+        chunks, encrypt_blocks, (public_key,), workers, chunks_in_flight
+    ):
+        target.write(FRAME.pack(len(cipher)))
+        target.write(cipher)
+        total += length
+
+    target.write(FRAME.pack(0))
+
+    return total
+
+
+def decrypt_stream(
+    source,
+    target,
+    public_key,
+    secret_key,
+    workers=1,
+    chunks_in_flight=None,
+):
+    """
+    Decrypts the framed cipher read from source and writes the payload to target.
+
+    Args:
+        source (file): Binary file-like object the cipher is read from.
+        target (file): Binary file-like object the payload is written to.
+        public_key (tuple): Public key (n, e) of the user decrypting.
+        secret_key (int, PrivateKey or MultiPrimeKey): Secret key of the user decrypting.
+        workers (int, optional): Number of worker processes. (1 means no processes.) Defaults to 1.
+        chunks_in_flight (int, optional): Maximal number of chunks in progress. Defaults to None (2 * workers).
+
+    Raises:
+        ValueError: If the cipher is damaged, truncated or was encrypted for another key.
+
+    Returns:
+        int: Number of bytes of the payload.
+    """
+    k, _ = block_sizes(public_key)
+    header = read_exactly(source, len(MAGIC) + FRAME.size)
+
+    if header[: len(MAGIC)] != MAGIC or FRAME.unpack(header[len(MAGIC) :])[0] != k:
+        raise ValueError("The stream was not encrypted for this key.")
+
+    total = 0
+
+    for payload, _ in process_chunks(
+        read_frames(source, k),
+        decrypt_blocks,
+        (public_key, secret_key),
+        workers,
+        chunks_in_flight,
+    ):
+        target.write(payload)
+        total += len(payload)
+
+    return total
+
+
+def process_chunks(chunks, function, arguments, workers, chunks_in_flight):
+    """
+    Applies the function to all the chunks, at most chunks_in_flight of them are in progress at once.
+
+    Yields:
+        tuple: Result of the function and the length of the chunk (in the same order as the chunks).
+    """
+    if workers == 1:
+        for chunk in chunks:
+            yield function(chunk, *arguments), len(chunk)
+        return
+
+    chunks_in_flight = chunks_in_flight or 2 * workers
+    in_flight = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            # (the chunk has to be copied once, to be sent to the worker)
+            in_flight.append((executor.submit(function, bytes(chunk), *arguments), len(chunk)))
+
+            if len(in_flight) >= chunks_in_flight:
+                future, length = in_flight.popleft()
+                yield future.result(), length
+
+        while in_flight:
+            future, length = in_flight.popleft()
+            yield future.result(), length
+
+
+def read_chunks(source, size):
+    """Yields the chunks of given size read from source (the last one may be shorter) as memoryviews."""
+    while True:
+        buffer = bytearray(size)
+        length = read_into(source, memoryview(buffer))
+
+        if length == 0:
+            return
+
+        yield memoryview(buffer)[:length]
+
+        if length < size:
+            return
+
+
+def read_frames(source, k):
+    """Yields the frames read from source until the end frame."""
+    while True:
+        (length,) = FRAME.unpack(read_exactly(source, FRAME.size))
+
+        if length == 0:
+            return
+
+        if length % k != 0:
+            raise ValueError("The stream is damaged.")
+
+        yield memoryview(read_exactly(source, length))
+
+
+def read_into(source, view):
+    """Reads from source until the view is full or the source ends. Returns the number of bytes read."""
+    length = 0
+
+    while length < len(view):
+        if hasattr(source, "readinto"):
+            count = source.readinto(view[length:])
+        else:
+            data = source.read(len(view) - length)
+            count = len(data)
+            view[length : length + count] = data
+
+        if not count:
+            break
+
+        length += count
+
+    return length
+
+
+def read_exactly(source, size):
+    """Reads exactly size bytes from source."""
+    buffer = bytearray(size)
+
+    if read_into(source, memoryview(buffer)) != size:
+        raise ValueError("The stream is truncated.")
+
+    return buffer
+
+
+# [1]
+def encrypt_blocks(chunk, public_key):
+    """Splits the chunk into blocks, pads and encrypts them. (Returns the concatenated encrypted blocks.)"""
+    n, e = public_key
+    k, data_size = block_sizes(public_key)
+    view = memoryview(chunk)
+    cipher = bytearray()
+
+    for start in range(0, len(view), data_size):
+        block = oaep_pad(view[start : start + data_size], k)
+        cipher += pow(int.from_bytes(block, "big"), e, n).to_bytes(k, "big")
+
+    return bytes(cipher)
+
+
+# [1]
+def decrypt_blocks(chunk, public_key, secret_key):
+    """Decrypts the blocks of the chunk and removes the padding. (Returns the concatenated payload.)"""
+    k, _ = block_sizes(public_key)
+    view = memoryview(chunk)
+    payload = bytearray()
+
+    for start in range(0, len(view), k):
+        c = int.from_bytes(view[start : start + k], "big")
+        block = rsa.private_power(c, public_key, secret_key).to_bytes(k, "big")
+        payload += oaep_unpad(block, k)
+
+    return bytes(payload)
+
+
+# [1]
+def mask(seed, length):
+    """Mask generation function MGF1 with SHA-256."""
+    output = bytearray()
+    counter = 0
+
+    while len(output) < length:
+        output += hashlib.sha256(seed + counter.to_bytes(4, "big")).digest()
+        counter += 1
+
+    return bytes(output[:length])
+
+
+# [1]
+def oaep_pad(data, k, label=b""):
+    """Encodes the data into a block of k bytes by OAEP (with SHA-256)."""
+    padding = bytes(k - len(data) - 2 * HASH_LENGTH - 2)
+    data_block = hashlib.sha256(label).digest() + padding + b"\x01" + bytes(data)
+
+    seed = os.urandom(HASH_LENGTH)
+    masked_data = bytes(a ^ b for a, b in zip(data_block, mask(seed, k - HASH_LENGTH - 1)))
+    masked_seed = bytes(a ^ b for a, b in zip(seed, mask(masked_data, HASH_LENGTH)))
+
+    return b"\x00" + masked_seed + masked_data
+
+
+# [1]
+def oaep_unpad(block, k, label=b""):
+    """Decodes the data from a block of k bytes encoded by OAEP (with SHA-256)."""
+    masked_seed = block[1 : HASH_LENGTH + 1]
+    masked_data = block[HASH_LENGTH + 1 :]
+
+    seed = bytes(a ^ b for a, b in zip(masked_seed, mask(masked_data, HASH_LENGTH)))
+    data_block = bytes(a ^ b for a, b in zip(masked_data, mask(seed, k - HASH_LENGTH - 1)))
+
+    # (one error for all the checks, so that the reason of the failure is not revealed)
+    separator = data_block.find(b"\x01", HASH_LENGTH)
+
+    if (
+        block[0] != 0
+        or data_block[:HASH_LENGTH] != hashlib.sha256(label).digest()
+        or separator < 0
+        or any(data_block[HASH_LENGTH:separator])
+    ):
+        raise ValueError("Decryption error.")
+
+    return data_block[separator + 1 :]
@@ -0,0 +1,521 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import discrete_log
+import factoring_jobs
+import primality_testing
+import rsa
+
+
+# Use of prime numbers in data encryption
+# Bachelor thesis
+# Department of Computer Science, Faculty of Science, Palacký University Olomouc
+# 2023
+# Matěj Ošťádal
+
+
+# Local service exposing the algorithms of this package over a TCP or Unix socket.
+#
+# Every request is one line of JSON: {"id": ..., "op": ..., "args": {...}}, every response is one line of JSON:
+# {"id": ..., "result": ...} or {"id": ..., "error": ...}. The responses of one connection can come in any order.
+#
+#   encrypt   message, public_key [n, e]                       -> cipher
+#   decrypt   cipher, public_key, secret_key {"d"} or {"primes"} -> message
+#   sign      message, public_key, secret_key                   -> signature
+#   verify    message, signature, public_key                    -> boolean
+#   is_prime  n                                                 -> boolean
+#   factor    n, method, time_budget                            -> {"factors", "cofactor"}
+#   dlog      generator, result, modulus, time_budget           -> exponent (or null)
+#   stats                                                       -> latency histograms of the endpoints
+#
+# The computations run in worker processes. Identical requests in progress at the same time are computed once.
+# Only a bounded number of requests waits for the workers, when the queue is full, the service stops reading
+# from the connections (backpressure).
+#
+# No request can keep a worker forever: the integers of the arguments have at most MAX_BITS bits, and every request
+# has a time limit (its time_budget for factor and dlog, at most MAX_TIME_BUDGET, OPERATION_TIMEOUT for the others).
+# The limit is enforced by the service itself: a worker process running over it is killed and started again.
+#
+# The module can be run from the command line:
+#   python service.py serve --port 8765
+#   python service.py load --port 8765 --op is_prime --requests 1000 --concurrency 32
+
+# Sources that were used for implementation purposes (pseudocode, idea, trick):
+# [1] https://docs.python.org/3/library/asyncio-stream.html
+
+
+MAX_BITS = 4096
+MAX_TIME_BUDGET = 30.0
+OPERATION_TIMEOUT = 10.0
+
+# (the budgeted operations get some time to return their partial results before they are killed)
+GRACE_TIME = 1.0
+
+BUDGETED = ("factor", "dlog")
+
+
+def time_budget(args):
+    """Returns the time budget (in seconds) of the request, at most MAX_TIME_BUDGET."""
+    budget = float(args.get("time_budget", 1.0))
+
+    if not budget > 0:
+        raise ValueError("Time budget must be positive.")
+
+    return min(budget, MAX_TIME_BUDGET)
+
+
+def time_limit(op, args):
+    """Returns the number of seconds the request may run in a worker."""
+    if op in BUDGETED:
+        return time_budget(args) + GRACE_TIME
+
+    return OPERATION_TIMEOUT
+
+
+def check_sizes(value):
+    """
+    Checks the sizes of all the integers of the arguments (also in the nested lists and objects).
+
+    Raises:
+        ValueError: If an integer has more than MAX_BITS bits.
+    """
+    if isinstance(value, int) and value.bit_length() > MAX_BITS:
+        raise ValueError(f"Integers of the arguments must have at most {MAX_BITS} bits.")
+
+    items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+
+    for item in items:
+        check_sizes(item)
+
+
+def secret_key_of(public_key, secret_key):
+    """Creates RSAPrivateKey from the JSON form {"d": d} or {"primes": [...]} of the secret key."""
+    return rsa.RSAPrivateKey(
+        public_key, secret_key.get("d"), secret_key.get("primes", ())
+    )
+
+
+def compute(op, args):
+    """Computes the result of one request. (Runs in the worker processes.)"""
+    check_sizes(args)
+
+    if op == "encrypt":
+        n, e = args["public_key"]
+        return pow(args["message"], e, n)
+
+    if op == "decrypt":
+        key = secret_key_of(args["public_key"], args["secret_key"])
+        return rsa.private_power(args["cipher"], key.public_key, key)
+
+    if op == "sign":
+        key = secret_key_of(args["public_key"], args["secret_key"])
+        return rsa.sign_message(args["message"], key.public_key, key)
+
+    if op == "verify":
+        return rsa.valid_signature(args["message"], args["signature"], args["public_key"])
+
+    if op == "is_prime":
+        return primality_testing.miller_rabin_test(args["n"], 20)[0]
+
+    if op == "factor":
+        job = factoring_jobs.FactoringJob(args["n"], args.get("method", "pollard_rho"))
+        factors, cofactor = job.run(time_budget(args))
+        return {"factors": factors, "cofactor": cofactor}
+
+    if op == "dlog":
+        # (the algorithm has no budget of its own, the worker is killed when the budget runs out)
+        return discrete_log.silver_pohlig_hellman(
+            args["generator"], args["result"], args["modulus"]
+        )
+
+    raise ValueError(f"Unknown operation {op}.")
+
+
+OPERATIONS = ("encrypt", "decrypt", "sign", "verify", "is_prime", "factor", "dlog")
+
+
+def work(connection):
+    """Computes the requests received over the pipe and sends back the results. (Runs in the worker processes.)"""
+    while True:
+        try:
+            op, args = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            connection.send(("result", compute(op, args)))
+        except Exception as error:
+            connection.send(("error", str(error)))
+
+
+class Worker:
+    """
+    One worker process computing the requests sent over a pipe. It is replaced, when a request runs out of time.
+
+    Attributes:
+        process (multiprocessing.Process): The worker process.
+        connection (multiprocessing.connection.Connection): The end of the pipe of the service.
+        restarts (int): Number of times the process was killed and started again.
+    """
+
+    def __init__(self, threads):
+        """
+        Args:
+            threads (ThreadPoolExecutor): Threads waiting for the results (so that the event loop does not block).
+        """
+        self.threads = threads
+        self.restarts = 0
+        self.start()
+
+    def start(self):
+        """Starts the worker process."""
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=work, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def restart(self):
+        """Kills the worker process and starts a new one."""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.restarts += 1
+        self.start()
+
+    def close(self):
+        """Stops the worker process."""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    async def run(self, op, args, timeout):
+        """
+        Computes one request in the worker process.
+
+        Raises:
+            TimeoutError: If the request was not computed in time. (The worker is started again.)
+            RuntimeError: If the computation failed.
+
+        Returns:
+            The result of the request.
+        """
+        loop = asyncio.get_running_loop()
+        self.connection.send((op, args))
+
+        try:
+            status, value = await asyncio.wait_for(
+                loop.run_in_executor(self.threads, self.connection.recv), timeout
+            )
+        except asyncio.TimeoutError:
+            self.restart()
+            raise TimeoutError(f"The request exceeded its time limit of {timeout} seconds.") from None
+        except (EOFError, OSError):
+            self.restart()
+            raise RuntimeError("The worker process failed.") from None
+
+        if status == "error":
+            raise RuntimeError(value)
+
+        return value
+
+
+class Histogram:
+    """Histogram of latencies with buckets of powers of two (in microseconds)."""
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        """Adds one latency (in seconds)."""
+        microseconds = int(seconds * 1e6)
+        self.buckets[microseconds.bit_length()] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction):
+        """Returns the upper bound (in seconds) of the bucket containing given fraction of the latencies."""
+        seen = 0
+
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+
+            if seen >= fraction * self.count:
+                return 2**bucket / 1e6
+
+        return 0.0
+
+    def summary(self):
+        """Returns the number of latencies, their mean, median, 99th percentile and the buckets."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "buckets": {f"<{2**bucket}us": count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class Service:
+    """
+    The service: accepts the connections, coalesces identical requests and passes them to the workers.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        pool (list): The workers, each of them has its own dispatcher.
+        queue (asyncio.Queue): Requests waiting for the workers. (Bounded.)
+        in_progress (dict): Futures of the requests being computed {(op, args): future}.
+        histograms (dict): For each operation a histogram of latencies.
+        coalesced (int): Number of requests answered by another identical request.
+    """
+
+    def __init__(self, workers=None, queue_size=256):
+        """
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to None (number of CPUs).
+            queue_size (int, optional): Maximal number of requests waiting for the workers. Defaults to 256.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.in_progress = {}
+        self.histograms = {op: Histogram() for op in OPERATIONS}
+        self.coalesced = 0
+        self.pool = []
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        """Runs the service on the TCP port (or the Unix socket with given path) until it is cancelled."""
+        threads = ThreadPoolExecutor(max_workers=self.workers)
+        self.pool = [Worker(threads) for _ in range(self.workers)]
+
+        # each dispatcher keeps one request in its worker
+        dispatchers = [asyncio.create_task(self.dispatch(worker)) for worker in self.pool]
+
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for dispatcher in dispatchers:
+                dispatcher.cancel()
+
+            for worker in self.pool:
+                worker.close()
+
+            threads.shutdown(cancel_futures=True)
+
+    async def dispatch(self, worker):
+        """Takes the requests from the queue and computes them in the worker."""
+        while True:
+            key, future = await self.queue.get()
+            op, args = key
+
+            try:
+                args = json.loads(args)
+                result = await worker.run(op, args, time_limit(op, args))
+                future.set_result(result)
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                del self.in_progress[key]
+
+    async def handle(self, reader, writer):
+        """Reads the requests of one connection and writes the responses."""
+        tasks = set()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    await self.respond(writer, {"id": None, "error": "Invalid JSON."})
+                    continue
+
+                if not isinstance(request, dict):
+                    await self.respond(writer, {"id": None, "error": "Request must be a JSON object."})
+                    continue
+
+                # (waits, when the queue is full, so no more lines are read from the connection)
+                future = await self.submit(request)
+
+                task = asyncio.create_task(self.answer(writer, request, future))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def submit(self, request):
+        """Returns the future of the result of the request. (Identical requests share one future.)"""
+        op = request.get("op")
+        loop = asyncio.get_running_loop()
+
+        if op == "stats":
+            future = loop.create_future()
+            future.set_result(self.stats())
+            return future
+
+        if op not in OPERATIONS:
+            future = loop.create_future()
+            future.set_exception(ValueError(f"Unknown operation {op}."))
+            return future
+
+        args = request.get("args", {})
+
+        if not isinstance(args, dict):
+            future = loop.create_future()
+            future.set_exception(ValueError("Arguments must be a JSON object."))
+            return future
+
+        key = (op, json.dumps(args, sort_keys=True))
+
+        if key in self.in_progress:
+            self.coalesced += 1
+            return self.in_progress[key]
+
+        future = loop.create_future()
+        self.in_progress[key] = future
+        await self.queue.put((key, future))
+
+        return future
+
+    async def answer(self, writer, request, future):
+        """Waits for the result and writes the response."""
+        start = time.perf_counter()
+
+        try:
+            response = {"id": request.get("id"), "result": await future}
+        except Exception as error:
+            response = {"id": request.get("id"), "error": str(error)}
+
+        if request.get("op") in self.histograms:
+            self.histograms[request["op"]].add(time.perf_counter() - start)
+
+        await self.respond(writer, response)
+
+    async def respond(self, writer, response):
+        """Writes the response. (Responses to closed connections are dropped.)"""
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def stats(self):
+        """Returns the latency histograms of the operations and the counters of the service."""
+        return {
+            "latency": {
+                op: histogram.summary()
+                for op, histogram in self.histograms.items()
+                if histogram.count
+            },
+            "queued": self.queue.qsize(),
+            "in_progress": len(self.in_progress),
+            "coalesced": self.coalesced,
+            "restarts": sum(worker.restarts for worker in self.pool),
+        }
+
+
+async def send_request(writer, request_id, op, args):
+    """Sends one request. (The response is read by the caller.)"""
+    writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode() + b"\n")
+    await writer.drain()
+
+
+async def load(host="127.0.0.1", port=8765, op="is_prime", requests=1000, concurrency=32, seed=None):
+    """
+    Load generator: sends the requests over concurrency connections and measures the latencies.
+
+    Args:
+        host (str, optional): Host of the service. Defaults to "127.0.0.1".
+        port (int, optional): Port of the service. Defaults to 8765.
+        op (str, optional): The operation ("is_prime", "factor" or "dlog"). Defaults to "is_prime".
+        requests (int, optional): Number of requests. Defaults to 1000.
+        concurrency (int, optional): Number of connections sending the requests at once. Defaults to 32.
+        seed (int, optional): Seed of the random generator of the arguments. Defaults to None.
+
+    Returns:
+        dict: Number of requests per second, errors and the summary of the latencies.
+    """
+    generator = random.Random(seed)
+    histogram = Histogram()
+    errors = 0
+
+    def arguments():
+        if op == "factor":
+            return {"n": generator.getrandbits(40), "time_budget": 0.5}
+
+        if op == "dlog":
+            return {"generator": 3, "result": generator.randrange(1, 65537), "modulus": 65537}
+
+        return {"n": generator.getrandbits(256) | 1}
+
+    async def client(count):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+
+        for i in range(count):
+            start = time.perf_counter()
+            await send_request(writer, i, op, arguments())
+            response = json.loads(await reader.readline())
+            histogram.add(time.perf_counter() - start)
+            errors += "error" in response
+
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    await asyncio.gather(*(client(count) for count in shares if count))
+    elapsed = time.perf_counter() - start
+
+    return {"throughput": requests / elapsed, "errors": errors, "latency": histogram.summary()}
+
+
+def main():
+    """Runs the service or the load generator given on the command line."""
+    parser = argparse.ArgumentParser(description="Service of the implemented algorithms.")
+    parser.add_argument("command", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument("--op", default="is_prime", choices=["is_prime", "factor", "dlog"])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=None)
+    arguments = parser.parse_args()
+
+    if arguments.command == "serve":
+        service = Service(arguments.workers, arguments.queue_size)
+        asyncio.run(service.serve(arguments.host, arguments.port, arguments.unix))
+    else:
+        report = asyncio.run(
+            load(
+                arguments.host,
+                arguments.port,
+                arguments.op,
+                arguments.requests,
+                arguments.concurrency,
+                arguments.seed,
+            )
+        )
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()